@@ -1,19 +1,38 @@
 import os
-from datetime import datetime
+import re
+import json
+import base64
+import threading
+import time
+import io
+import click
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, session, render_template, redirect, url_for, flash
+from flask import Flask, Response, g, make_response, request, jsonify, session, render_template, redirect, url_for, flash, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from werkzeug.http import is_resource_modified
 from werkzeug.security import generate_password_hash, check_password_hash
-from functools import wraps
+from functools import lru_cache, wraps
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField
 from wtforms.validators import DataRequired, Email, EqualTo, Length
 from flask_migrate import Migrate
-from chatbot_modules.base_module import ModularPrescreeningTool
-from job_matcher import JobMatcher
+from markupsafe import Markup
+import instrumentation
+from lm_provider import LazyObject, get_scheduler
+from llm_scheduler import SchedulerBusy
+from skill_cache import SkillCache
+from code_fingerprint import CodeAssessmentCache
+from fragment_cache import FragmentCache
+from sqlalchemy import and_, or_, insert, inspect, text, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import func
 import uuid
+import hashlib
 
+from job_io import FORMATS, batched, detect_format, read_records, validate_job, write_records
 from job_matcher import JobMatcher, Applicant, Job as MatcherJob
 
 load_dotenv()
@@ -22,8 +41,37 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(24)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///prescreening.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['MATCH_SHORTLIST_SIZE'] = int(os.environ.get('MATCH_SHORTLIST_SIZE', 20))
+app.config['MATCH_CONCURRENCY'] = int(os.environ.get('MATCH_CONCURRENCY', 4))
+app.config['MATCH_TIMEOUT'] = float(os.environ.get('MATCH_TIMEOUT', 30))
+app.config['SIMILAR_JOB_CANDIDATES'] = int(os.environ.get('SIMILAR_JOB_CANDIDATES', 25))
+app.config['JOB_LISTING_TOKEN_BUDGET'] = int(os.environ.get('JOB_LISTING_TOKEN_BUDGET', 3000))
+app.config['MATCH_BATCH_SIZE'] = int(os.environ.get('MATCH_BATCH_SIZE', 10))
+app.config['MATCH_BATCH_MAX_CHARS'] = int(os.environ.get('MATCH_BATCH_MAX_CHARS', 12000))
+app.config['CONVERSATION_TOKEN_BUDGET'] = int(os.environ.get('CONVERSATION_TOKEN_BUDGET', 2000))
+app.config['MATCH_WORKERS'] = int(os.environ.get('MATCH_WORKERS', 2))
+app.config['MATCH_TASK_TIMEOUT'] = int(os.environ.get('MATCH_TASK_TIMEOUT', 300))
+app.config['JOBS_PER_PAGE'] = int(os.environ.get('JOBS_PER_PAGE', 20))
+app.config['CODE_ASSESSMENT_MAX_CHARS'] = int(os.environ.get('CODE_ASSESSMENT_MAX_CHARS', 20000))
+app.config['ASSESSMENT_FULL_EVERY'] = int(os.environ.get('ASSESSMENT_FULL_EVERY', 10))
+app.config['MATCH_SCORE_TOP_K'] = int(os.environ.get('MATCH_SCORE_TOP_K', 50))
+app.config['BEST_CANDIDATES_LIMIT'] = int(os.environ.get('BEST_CANDIDATES_LIMIT', 50))
+app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+app.config['IMPORT_SKILL_WORKERS'] = int(os.environ.get('IMPORT_SKILL_WORKERS', 8))
+app.config['JOB_INDEX_PATH'] = os.environ.get('JOB_INDEX_PATH') or os.path.join(app.instance_path, 'job_index')
+app.config['JOB_INDEX_CHECK_INTERVAL'] = float(os.environ.get('JOB_INDEX_CHECK_INTERVAL', 5))
+app.config['JOB_INDEX_PUBLISH_DELAY'] = float(os.environ.get('JOB_INDEX_PUBLISH_DELAY', 5))
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 5000))
+app.config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', 32))
+app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # The job_fts full-text index (and its shadow tables) is managed by hand-written migrations.
+    return not (type_ == 'table' and name.startswith('job_fts'))
+
+migrate = Migrate(app, db, include_object=include_object)
+instrumentation.instrument_sqlalchemy(Engine)
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -57,6 +105,16 @@ class Job(db.Model):
     description = db.Column(db.Text, nullable=False)
     employer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     unique_link = db.Column(db.String(36), unique=True, nullable=False)
+    external_id = db.Column(db.String(100))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_job_employer_external_id', 'employer_id', 'external_id', unique=True),)
+
+class VersionCounter(db.Model):
+    """A counter bumped whenever the content behind a cached page changes, e.g. 'jobs' or 'employer:<id>'."""
+    key = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -64,6 +122,73 @@ class Application(db.Model):
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
     status = db.Column(db.String(20), default='pending')
     application_date = db.Column(db.DateTime, default=datetime.utcnow)
+    match_score = db.Column(db.Float)
+    __table_args__ = (
+        db.Index('ix_application_job_date', 'job_id', 'application_date'),
+        db.Index('ix_application_job_score', 'job_id', 'match_score'),
+        db.Index('ix_application_applicant_job', 'applicant_id', 'job_id', unique=True),
+    )
+
+class Conversation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    applicant_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    summary = db.Column(db.Text, nullable=False, default='')
+    summarized_through = db.Column(db.Integer, nullable=False, default=0)
+    assessment_state = db.Column(db.Text)  # JSON running assessment, see update_conversation_assessment
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    turns = db.relationship('ConversationTurn', backref='conversation', lazy='dynamic', cascade='all, delete-orphan')
+    __table_args__ = (db.UniqueConstraint('applicant_id', 'job_id', name='uq_conversation_applicant_job'),)
+
+class ConversationTurn(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False, index=True)
+    user_input = db.Column(db.Text, nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class MatchResult(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    applicant_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    skill_similarity = db.Column(db.Float, nullable=False)
+    reasoning = db.Column(db.Text)
+    assessments = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_match_result_job_applicant', 'job_id', 'applicant_id', 'id'),)
+
+class MatchTask(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    applicant_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    applicant_profile = db.Column(db.Text, nullable=False)
+    state = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # At most one queued or running task per application, however many completions race to enqueue one.
+    __table_args__ = (db.Index('uq_match_task_active', 'applicant_id', 'job_id', unique=True,
+                               sqlite_where=db.text("state IN ('queued', 'running')"),
+                               postgresql_where=db.text("state IN ('queued', 'running')")),)
+
+class ApplicantProfile(db.Model):
+    applicant_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    profile = db.Column(db.Text, nullable=False)
+    skills = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MatchScore(db.Model):
+    """Skill similarity of an applicant to one of their MATCH_SCORE_TOP_K best jobs."""
+    applicant_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_match_score_applicant_score', 'applicant_id', 'score'),
+        db.Index('ix_match_score_job_score', 'job_id', 'score'),
+    )
 
 class CompanyForm(FlaskForm):
     name = StringField('Company Name', validators=[DataRequired(), Length(max=100)])
@@ -74,8 +199,39 @@ class AdditionalInfoForm(FlaskForm):
     field_name = StringField('Field Name', validators=[DataRequired(), Length(max=100)])
     field_value = TextAreaField('Field Value', validators=[DataRequired()])
     submit = SubmitField('Add')
-tool = ModularPrescreeningTool()
-job_matcher = JobMatcher()
+def create_tool():
+    from chatbot_modules.base_module import ModularPrescreeningTool
+    return ModularPrescreeningTool()
+
+def create_assessment_manager():
+    from assessment_module import AssessmentManager
+    return AssessmentManager(tool.lm, code_cache=code_assessment_cache,
+                             max_code_chars=app.config['CODE_ASSESSMENT_MAX_CHARS'],
+                             full_every=app.config['ASSESSMENT_FULL_EVERY'])
+
+def create_job_matcher():
+    from job_vector_store import JobVectorStore
+    return JobMatcher(
+        skill_cache=skill_cache,
+        shortlist_size=app.config['MATCH_SHORTLIST_SIZE'],
+        max_concurrency=app.config['MATCH_CONCURRENCY'],
+        match_timeout=app.config['MATCH_TIMEOUT'],
+        listing_token_budget=app.config['JOB_LISTING_TOKEN_BUDGET'],
+        batch_size=app.config['MATCH_BATCH_SIZE'],
+        batch_max_chars=app.config['MATCH_BATCH_MAX_CHARS'],
+        vector_store=JobVectorStore(app.config['JOB_INDEX_PATH']),
+        index_check_interval=app.config['JOB_INDEX_CHECK_INTERVAL'],
+    )
+
+# Built on first use so that importing the app (migrations, CLI, workers) does not load dspy or the LM.
+tool = LazyObject(create_tool)
+assessment_manager = LazyObject(create_assessment_manager)
+os.makedirs(app.instance_path, exist_ok=True)
+skill_cache = SkillCache(os.environ.get('SKILL_CACHE_PATH') or os.path.join(app.instance_path, 'skill_cache.db'))
+code_assessment_cache = CodeAssessmentCache(
+    os.environ.get('CODE_ASSESSMENT_CACHE_PATH') or os.path.join(app.instance_path, 'code_assessment_cache.db'))
+job_matcher = LazyObject(create_job_matcher)
+fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
 
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -94,6 +250,214 @@ class JobForm(FlaskForm):
     description = TextAreaField('Job Description', validators=[DataRequired()])
     submit = SubmitField('Submit')
 
+class ImportJobsForm(FlaskForm):
+    file = FileField('Jobs file (CSV or JSON Lines)',
+                     validators=[FileRequired(), FileAllowed(['csv', 'jsonl', 'ndjson'], 'CSV or JSON Lines files only.')])
+    submit = SubmitField('Import')
+
+def invalidate_job_skills(description):
+    """Forget the skills extracted from a job's old description."""
+    if job_matcher.is_loaded:
+        job_matcher.invalidate_skills(description)
+    else:
+        skill_cache.invalidate(description)
+
+def to_matcher_job(job):
+    return MatcherJob(id=job.id, title=job.title, description=job.description)
+
+def iter_matcher_jobs(batch_size=500):
+    """Stream jobs as MatcherJobs without loading the whole table at once."""
+    rows = Job.query.with_entities(Job.id, Job.title, Job.description).yield_per(batch_size)
+    return (to_matcher_job(row) for row in rows)
+
+def ensure_job_index():
+    """Map the published job index the first time it is needed, fitting and publishing one if there is none."""
+    if job_matcher.job_index.is_built or job_matcher.load_job_index():
+        return
+    with job_matcher.job_index.store.lock():
+        # Another worker may have published while this one waited for the lock.
+        if not job_matcher.load_job_index():
+            job_matcher.build_job_index(iter_matcher_jobs())
+
+def publish_job_index():
+    """Refit the job index over every job and publish it to all workers through the vector store."""
+    with job_matcher.job_index.store.lock():
+        job_matcher.build_job_index(iter_matcher_jobs())
+    return job_matcher.job_index.version
+
+job_index_publish_requested = threading.Event()
+job_index_publishers = []
+job_index_publishers_lock = threading.Lock()
+job_index_refreshes = set()
+
+def schedule_job_index_publish(*refreshes):
+    """Republish the job index in the background; changes within JOB_INDEX_PUBLISH_DELAY share one rebuild.
+
+    refreshes are (kind, object_id) score refreshes to queue again once a
+    rebuild that includes the change is published: a refresh run before then
+    may have scored against a version without it.
+    """
+    with job_index_publishers_lock:
+        job_index_refreshes.update(refreshes)
+        if not job_index_publishers:
+            publisher = threading.Thread(target=job_index_publisher, name='job-index-publisher', daemon=True)
+            publisher.start()
+            job_index_publishers.append(publisher)
+    job_index_publish_requested.set()
+
+def job_index_publisher():
+    while True:
+        job_index_publish_requested.wait()
+        time.sleep(app.config['JOB_INDEX_PUBLISH_DELAY'])
+        job_index_publish_requested.clear()
+        # Taken before the rebuild reads the jobs, so every change behind these refreshes is in it.
+        with job_index_publishers_lock:
+            refreshes = set(job_index_refreshes)
+            job_index_refreshes.clear()
+        with app.app_context():
+            try:
+                # Until some worker has needed the index there is nothing to keep up to date.
+                if job_matcher.job_index.store.current() is not None:
+                    publish_job_index()
+                for kind, object_id in refreshes:
+                    schedule_score_refresh(kind, object_id)
+            except SchedulerBusy as e:
+                with job_index_publishers_lock:
+                    job_index_refreshes.update(refreshes)
+                job_index_publish_requested.set()
+                time.sleep(e.retry_after or 1)
+            except Exception:
+                app.logger.exception("Publishing the job index failed")
+            finally:
+                db.session.remove()
+
+def load_matcher_jobs(job_ids):
+    """Load the given jobs, keeping the order of job_ids."""
+    jobs = {j.id: j for j in Job.query.filter(Job.id.in_(job_ids)).all()} if job_ids else {}
+    return [to_matcher_job(jobs[job_id]) for job_id in job_ids if job_id in jobs]
+
+@app.cli.command('build-job-index')
+def build_job_index_command():
+    """Extract skills for every job, fit the job index and publish it to the workers (warms the skill cache)."""
+    version = publish_job_index()
+    print(f"Indexed {len(job_matcher.job_index)} jobs as version {version}.")
+
+def cache_metrics():
+    caches = [('skill', skill_cache), ('code_assessment', code_assessment_cache), ('fragment', fragment_cache)]
+    for name, cache in caches:
+        for stat, value in cache.stats().items():
+            yield f'cache_{stat}', {'cache': name}, value
+    if job_matcher.is_loaded:
+        yield 'job_index_jobs', {}, len(job_matcher.job_index)
+    for stat, value in get_scheduler().stats().items():
+        yield f'llm_scheduler_{stat}', {}, value
+
+instrumentation.register_collector(cache_metrics)
+
+@app.before_request
+def start_request_profile():
+    g.profile_token = instrumentation.start_profile()
+
+@app.after_request
+def record_request_profile(response):
+    profile = instrumentation.current_profile()
+    if profile is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    instrumentation.inc('http_requests_total', endpoint=endpoint, status=response.status_code)
+    instrumentation.observe('http_request_seconds', time.perf_counter() - profile.started, endpoint=endpoint)
+    if app.config['PROFILE_REQUESTS']:
+        response.headers['Server-Timing'] = profile.server_timing()
+        response.headers['X-Profile'] = json.dumps(profile.summary())
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        instrumentation.finish_profile(token)
+
+@app.errorhandler(SchedulerBusy)
+def scheduler_busy(e):
+    retry_after = max(int(e.retry_after or 1), 1)
+    return jsonify({"error": "We're handling a lot of requests right now. Please try again shortly."}), 503, \
+        {'Retry-After': str(retry_after)}
+
+@app.route('/metrics')
+def metrics():
+    return Response(instrumentation.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def next_job_version():
+    """Bump the catalog-wide job version counter in the current transaction and return its new value.
+
+    Created and edited jobs take the new value as their version, so versions
+    only ever grow and a (job id, version) pair always means the same content.
+    """
+    now = datetime.utcnow()
+    bumped = VersionCounter.query.filter_by(key='jobs') \
+        .update({'version': VersionCounter.version + 1, 'updated_at': now}, synchronize_session=False)
+    if not bumped:
+        # Databases created with create_all() rather than migrations start without the row.
+        db.session.add(VersionCounter(key='jobs', version=1, updated_at=now))
+        db.session.flush()
+    return db.session.query(VersionCounter.version).filter_by(key='jobs').scalar()
+
+def jobs_version():
+    """(version, updated_at) of the job catalog as a whole; changes whenever any job does."""
+    row = db.session.query(VersionCounter.version, VersionCounter.updated_at).filter_by(key='jobs').first()
+    return tuple(row) if row else (0, None)
+
+@lru_cache(maxsize=None)
+def template_fingerprint():
+    """Hash of the templates, so that page ETags change when a deploy changes how pages render."""
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + f.read())
+    return digest.hexdigest()
+
+def cached_page(parts, last_modified, render):
+    """Respond with ETag/Last-Modified validators, answering 304 without calling render() if the client is current.
+
+    parts are the version values the page depends on; the viewer is added
+    since pages differ per user. Pages with pending flash messages are always
+    rendered so the messages get shown.
+    """
+    etag = hashlib.sha256(json.dumps(
+        [template_fingerprint(), session.get('user_id'), session.get('role'), *parts], default=str
+    ).encode('utf-8')).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0)
+    if '_flashes' in session or is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response(render())
+    else:
+        response = Response(status=304)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+def job_fragments(template, versions, load_jobs, **context):
+    """Render template once per job, reusing fragments cached for the same job version.
+
+    versions lists (job_id, version) in display order; load_jobs(job_ids)
+    returns the jobs whose fragment is not cached. Jobs deleted meanwhile are
+    left out.
+    """
+    fragments = {}
+    for job_id, version in versions:
+        fragment = fragment_cache.get((template, request.host_url, job_id, version))
+        if fragment is not None:
+            fragments[job_id] = fragment
+    missing = [job_id for job_id, _ in versions if job_id not in fragments]
+    for job in load_jobs(missing) if missing else ():
+        fragments[job.id] = fragment_cache.set((template, request.host_url, job.id, job.version),
+                                               Markup(render_template(template, job=job, **context)))
+    return [fragments[job_id] for job_id, _ in versions if job_id in fragments]
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -148,14 +512,86 @@ def logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('home'))
 
+JOB_EXCERPT_LENGTH = 200
+job_search_backend_name = None
+
+def job_search_backend():
+    """Pick how job search runs on this database: 'fts5', 'postgresql' or a plain 'like' scan."""
+    global job_search_backend_name
+    if job_search_backend_name is None:
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite' and inspect(db.engine).has_table('job_fts'):
+            job_search_backend_name = 'fts5'
+        elif dialect == 'postgresql':
+            job_search_backend_name = 'postgresql'
+        else:
+            job_search_backend_name = 'like'
+    return job_search_backend_name
+
+def search_jobs(search, page, per_page):
+    """Return up to per_page + 1 (id, title, excerpt, version) rows for one page of the job listing.
+
+    Only a short description excerpt is selected. Searches use the job_fts
+    FTS5 table on SQLite and the full-text GIN index on PostgreSQL, ranked
+    by relevance; browsing without a search lists the newest jobs first.
+    """
+    offset = (page - 1) * per_page
+    terms = re.findall(r'\w+', search)
+    excerpt = func.substr(Job.description, 1, JOB_EXCERPT_LENGTH).label('excerpt')
+    if not terms:
+        return db.session.query(Job.id, Job.title, excerpt, Job.version).order_by(Job.id.desc()) \
+            .offset(offset).limit(per_page + 1).all()
+
+    backend = job_search_backend()
+    if backend == 'fts5':
+        return db.session.execute(text(
+            'SELECT job.id, job.title, substr(job.description, 1, :excerpt_length) AS excerpt, job.version '
+            'FROM job_fts JOIN job ON job.id = job_fts.rowid '
+            'WHERE job_fts MATCH :match ORDER BY job_fts.rank LIMIT :limit OFFSET :offset'
+        ), {
+            'match': ' '.join(f'"{term}"*' for term in terms),
+            'excerpt_length': JOB_EXCERPT_LENGTH,
+            'limit': per_page + 1,
+            'offset': offset,
+        }).all()
+
+    query = db.session.query(Job.id, Job.title, excerpt, Job.version)
+    if backend == 'postgresql':
+        document = func.to_tsvector('english', Job.title + ' ' + Job.description)
+        tsquery = func.plainto_tsquery('english', ' '.join(terms))
+        query = query.filter(document.op('@@')(tsquery)).order_by(func.ts_rank(document, tsquery).desc(), Job.id.desc())
+    else:
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(or_(Job.title.ilike(pattern), Job.description.ilike(pattern)))
+        query = query.order_by(Job.id.desc())
+    return query.offset(offset).limit(per_page + 1).all()
+
 @app.route('/applicant_dashboard')
 @login_required
 def applicant_dashboard():
     if session.get('role') != 'applicant':
         flash('Access denied.', 'danger')
         return redirect(url_for('home'))
-    jobs = Job.query.all()
-    return render_template('applicant_dashboard.html', jobs=jobs)
+    search = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = app.config['JOBS_PER_PAGE']
+    recommended = db.session.query(Job.id, Job.title, MatchScore.score) \
+        .join(MatchScore, MatchScore.job_id == Job.id) \
+        .filter(MatchScore.applicant_id == session['user_id']) \
+        .order_by(MatchScore.score.desc()).limit(5).all()
+    version, _ = jobs_version()
+
+    def render():
+        rows = search_jobs(search, page, per_page)
+        job_blocks = job_fragments('job_item.html', [(row.id, row.version) for row in rows[:per_page]],
+                                   lambda job_ids: [row for row in rows if row.id in job_ids])
+        return render_template('applicant_dashboard.html', job_blocks=job_blocks, search=search, page=page,
+                               has_next=len(rows) > per_page, recommended=recommended)
+
+    # Stored scores change without a job changing, so Last-Modified cannot cover the recommendations.
+    return cached_page(['applicant_dashboard', version, search, page, [tuple(row) for row in recommended]],
+                       None, render)
 
 @app.route('/employer_dashboard')
 @login_required
@@ -163,8 +599,15 @@ def employer_dashboard():
     if session.get('role') != 'employer':
         flash('Access denied.', 'danger')
         return redirect(url_for('home'))
-    jobs = Job.query.filter_by(employer_id=session['user_id']).all()
-    return render_template('employer_dashboard.html', jobs=jobs)
+    versions = [tuple(row) for row in Job.query.filter_by(employer_id=session['user_id'])
+                .with_entities(Job.id, Job.version).order_by(Job.id)]
+    _, updated_at = jobs_version()
+
+    def render():
+        job_blocks = job_fragments('employer_job.html', versions, lambda job_ids: Job.query.filter(Job.id.in_(job_ids)).all())
+        return render_template('employer_dashboard.html', job_blocks=job_blocks)
+
+    return cached_page(['employer_dashboard', versions], updated_at, render)
 
 @app.route('/create_job', methods=['GET', 'POST'])
 @login_required
@@ -176,9 +619,12 @@ def create_job():
     form = JobForm()
     if form.validate_on_submit():
         unique_link = str(uuid.uuid4())
-        new_job = Job(title=form.title.data, description=form.description.data, employer_id=session['user_id'], unique_link=unique_link)
+        new_job = Job(title=form.title.data, description=form.description.data, employer_id=session['user_id'],
+                      unique_link=unique_link, version=next_job_version())
         db.session.add(new_job)
         db.session.commit()
+        schedule_job_index_publish(('job', new_job.id))
+        schedule_score_refresh('job', new_job.id)
         flash('Job created successfully!', 'success')
         return redirect(url_for('job_link', unique_link=unique_link))
     return render_template('create_job.html', form=form)
@@ -234,13 +680,33 @@ def edit_job(job_id):
     
     form = JobForm(obj=job)
     if form.validate_on_submit():
+        description_changed = form.description.data != job.description
+        if description_changed:
+            invalidate_job_skills(job.description)
+        if description_changed or form.title.data != job.title:
+            job.version = next_job_version()
+            job.updated_at = datetime.utcnow()
         job.title = form.title.data
         job.description = form.description.data
         db.session.commit()
+        if description_changed:
+            schedule_job_index_publish(('job', job.id))
+            schedule_score_refresh('job', job.id)
         flash('Job updated successfully!', 'success')
         return redirect(url_for('employer_dashboard'))
     return render_template('edit_job.html', form=form, job=job)
 
+def delete_job_rows(job_id):
+    """Delete everything that references a job, ahead of deleting the job itself.
+
+    Besides keeping foreign keys valid, this stops a later job that reuses
+    the id (SQLite does) from inheriting conversations, assessments or matches.
+    """
+    conversation_ids = db.session.query(Conversation.id).filter(Conversation.job_id == job_id)
+    ConversationTurn.query.filter(ConversationTurn.conversation_id.in_(conversation_ids)).delete(synchronize_session=False)
+    for model in (Conversation, MatchTask, MatchResult, MatchScore, Application):
+        model.query.filter_by(job_id=job_id).delete(synchronize_session=False)
+
 @app.route('/delete_job/<int:job_id>', methods=['POST'])
 @login_required
 def delete_job(job_id):
@@ -253,66 +719,796 @@ def delete_job(job_id):
         flash('Access denied.', 'danger')
         return redirect(url_for('employer_dashboard'))
     
+    affected = [row.applicant_id for row in MatchScore.query.filter_by(job_id=job_id).with_entities(MatchScore.applicant_id)]
+    delete_job_rows(job_id)
     db.session.delete(job)
+    next_job_version()
     db.session.commit()
+    if job_matcher.is_loaded:
+        job_matcher.remove_job(job_id)
+    schedule_job_index_publish(*(('applicant', applicant_id) for applicant_id in affected))
+    for applicant_id in affected:
+        schedule_score_refresh('applicant', applicant_id)
     flash('Job deleted successfully!', 'success')
     return redirect(url_for('employer_dashboard'))
 
+def import_job_records(records, employer_id, batch_size=1000, max_errors=100):
+    """Validate (line_number, record) pairs from read_records and save them in batched transactions.
+
+    A row whose external_id this employer has imported before updates that
+    job; every other row becomes a new job with its own unique_link. Returns
+    counts, the first max_errors (line_number, message) errors and the ids
+    of jobs whose description is new and needs skill extraction.
+    """
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': [], 'job_ids': []}
+
+    def valid_rows():
+        for line_number, record in records:
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                yield validate_job(record)
+            except ValueError as e:
+                result['failed'] += 1
+                if len(result['errors']) < max_errors:
+                    result['errors'].append((line_number, str(e)))
+
+    for batch in batched(valid_rows(), batch_size):
+        # Rows without an external_id are always new; otherwise the last row for an id wins.
+        keyed = {row['external_id']: row for row in batch if row['external_id'] is not None}
+        rows = [row for row in batch if row['external_id'] is None] + list(keyed.values())
+        existing = {
+            job.external_id: job for job in Job.query.filter(Job.employer_id == employer_id, Job.external_id.in_(keyed))
+            .with_entities(Job.id, Job.external_id, Job.title, Job.description)
+        } if keyed else {}
+
+        changes, new_rows = [], []
+        version, now = None, datetime.utcnow()
+        for row in rows:
+            job = existing.get(row['external_id'])
+            if job is not None and (job.title, job.description) == (row['title'], row['description']):
+                result['unchanged'] += 1
+                continue
+            version = version or next_job_version()
+            if job is None:
+                new_rows.append({**row, 'employer_id': employer_id, 'unique_link': str(uuid.uuid4()), 'version': version,
+                                 'updated_at': now})
+            else:
+                changes.append({'id': job.id, 'title': row['title'], 'description': row['description'],
+                                'version': version, 'updated_at': now})
+                if job.description != row['description']:
+                    invalidate_job_skills(job.description)
+                    result['job_ids'].append(job.id)
+        if changes:
+            db.session.execute(update(Job), changes)
+        if new_rows:
+            result['job_ids'] += db.session.execute(insert(Job).returning(Job.id), new_rows).scalars().all()
+        db.session.commit()
+        result['created'] += len(new_rows)
+        result['updated'] += len(changes)
+    return result
+
+def warm_imported_jobs(job_ids, batch_size=1000):
+    """Extract skills for imported jobs in parallel, adding them to the job index if it is built."""
+    for start in range(0, len(job_ids), batch_size):
+        job_matcher.index_jobs(load_matcher_jobs(job_ids[start:start + batch_size]), app.config['IMPORT_SKILL_WORKERS'])
+
+def start_import_warmup(job_ids):
+    """Warm imported jobs in the background, then refresh stored scores once for the whole import."""
+    def run():
+        with app.app_context():
+            try:
+                warm_imported_jobs(job_ids)
+                schedule_job_index_publish(('all', None))
+                schedule_score_refresh('all', None)
+            except Exception:
+                app.logger.exception("Warming %d imported jobs failed", len(job_ids))
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=run, name='import-warmup', daemon=True).start()
+
+EXPORT_JOB_FIELDS = ('id', 'external_id', 'title', 'description', 'unique_link')
+EXPORT_APPLICATION_FIELDS = ('id', 'job_id', 'job_external_id', 'job_title', 'applicant_id', 'applicant_email',
+                             'status', 'application_date', 'match_score')
+
+def export_job_rows(employer_id=None, batch_size=1000):
+    query = Job.query.with_entities(*(getattr(Job, field) for field in EXPORT_JOB_FIELDS))
+    if employer_id is not None:
+        query = query.filter(Job.employer_id == employer_id)
+    return (row._asdict() for row in query.order_by(Job.id).yield_per(batch_size))
+
+def export_application_rows(employer_id=None, batch_size=1000):
+    query = db.session.query(
+        Application.id, Application.job_id, Job.external_id.label('job_external_id'), Job.title.label('job_title'),
+        Application.applicant_id, User.email.label('applicant_email'), Application.status,
+        Application.application_date, Application.match_score,
+    ).join(Job, Job.id == Application.job_id).join(User, User.id == Application.applicant_id)
+    if employer_id is not None:
+        query = query.filter(Job.employer_id == employer_id)
+    return (row._asdict() for row in query.order_by(Application.id).yield_per(batch_size))
+
+def export_response(rows, fields, fmt, name):
+    mimetype = 'application/x-ndjson' if fmt == 'jsonl' else 'text/csv'
+    return Response(stream_with_context(write_records(rows, fields, fmt)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'})
+
+@app.route('/import_jobs', methods=['GET', 'POST'])
+@login_required
+def import_jobs():
+    if session.get('role') != 'employer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('home'))
+
+    form = ImportJobsForm()
+    result = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            result = import_job_records(read_records(stream, detect_format(upload.filename)), session['user_id'],
+                                        app.config['IMPORT_BATCH_SIZE'])
+        except UnicodeDecodeError:
+            db.session.rollback()
+            flash('The file is not valid UTF-8.', 'danger')
+            return render_template('import_jobs.html', form=form, result=None)
+        if result['job_ids']:
+            start_import_warmup(result['job_ids'])
+        flash(f"Imported {result['created']} new and {result['updated']} updated jobs"
+              f" ({result['failed']} rows rejected).", 'success' if not result['failed'] else 'warning')
+    return render_template('import_jobs.html', form=form, result=result)
+
+@app.route('/export/jobs')
+@login_required
+def export_jobs():
+    if session.get('role') != 'employer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('home'))
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    return export_response(export_job_rows(session['user_id']), EXPORT_JOB_FIELDS, fmt, 'jobs')
+
+@app.route('/export/applications')
+@login_required
+def export_applications():
+    if session.get('role') != 'employer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('home'))
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    return export_response(export_application_rows(session['user_id']), EXPORT_APPLICATION_FIELDS, fmt,
+                           'applications')
+
+def find_employer(email):
+    employer = User.query.filter_by(email=email, role='employer').first()
+    if employer is None:
+        raise click.ClickException(f"No employer with email {email}")
+    return employer
+
+@app.cli.command('import-jobs')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--employer', 'email', required=True, help='Email of the employer that owns the jobs.')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Input format (default: from the file extension).')
+@click.option('--batch-size', type=int, default=None, help='Rows per transaction (default: IMPORT_BATCH_SIZE).')
+@click.option('--skip-skills', is_flag=True, help='Do not extract skills for the imported jobs.')
+def import_jobs_command(source, email, fmt, batch_size, skip_skills):
+    """Create or update jobs from a CSV or JSON Lines file ('-' for stdin).
+
+    Rows need title and description, and may carry an external_id so that
+    later imports update the same job. Unless --skip-skills is given, the job
+    index is then republished so running servers pick the new jobs up.
+    """
+    employer = find_employer(email)
+    fmt = fmt or detect_format(source.name)
+    result = import_job_records(read_records(source, fmt), employer.id, batch_size or app.config['IMPORT_BATCH_SIZE'])
+    for line_number, message in result['errors']:
+        print(f"line {line_number}: {message}")
+    print(f"Created {result['created']}, updated {result['updated']}, unchanged {result['unchanged']}, "
+          f"rejected {result['failed']}.")
+    if result['job_ids'] and not skip_skills:
+        started = time.perf_counter()
+        warm_imported_jobs(result['job_ids'])
+        print(f"Extracted skills for {len(result['job_ids'])} jobs in {time.perf_counter() - started:.1f}s.")
+        print(f"Published job index version {publish_job_index()}.")
+        print(f"Refreshed scores for {refresh_all_scores()} applicants.")
+
+@app.cli.command('export-jobs')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--employer', 'email', help='Only export jobs of this employer.')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+def export_jobs_command(output, email, fmt):
+    """Write jobs to OUTPUT (default stdout) as CSV or JSON Lines."""
+    employer_id = find_employer(email).id if email else None
+    output.writelines(write_records(export_job_rows(employer_id), EXPORT_JOB_FIELDS, fmt))
+
+@app.cli.command('export-applications')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--employer', 'email', help='Only export applications to this employer\'s jobs.')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+def export_applications_command(output, email, fmt):
+    """Write applications to OUTPUT (default stdout) as CSV or JSON Lines."""
+    employer_id = find_employer(email).id if email else None
+    output.writelines(write_records(export_application_rows(employer_id), EXPORT_APPLICATION_FIELDS, fmt))
+
 @app.route('/job/<unique_link>')
 def job_link(unique_link):
-    job = Job.query.filter_by(unique_link=unique_link).first_or_404()
+    job = Job.query.filter_by(unique_link=unique_link).with_entities(Job.id, Job.version, Job.updated_at).first_or_404()
     if 'user_id' not in session:
         session['next'] = url_for('job_link', unique_link=unique_link)
         return redirect(url_for('login'))
     if session.get('role') != 'applicant':
         flash('Only applicants can apply for jobs.', 'warning')
         return redirect(url_for('home'))
-    return render_template('job_application.html', job=job)
+    return cached_page(['job_link', job.id, job.version], job.updated_at,
+                       lambda: render_template('job_application.html', job=db.session.get(Job, job.id)))
+
 
+def update_conversation_assessment(conversation_id, final=False):
+    """Fold turns not yet assessed into the conversation's stored running assessment and return it.
 
-job_matcher = JobMatcher()
+    Runs after each chat turn from the background refresher. The match task
+    calls it with final set, which re-evaluates personality and communication
+    over the whole transcript even if every turn has already been folded in.
+    """
+    conversation = db.session.get(Conversation, conversation_id)
+    if conversation is None:
+        return None
+    stored = conversation.assessment_state
+    state = json.loads(stored) if stored else assessment_manager.new_state()
+    turns = conversation.turns.filter(ConversationTurn.id > state.get('through', 0)) \
+        .order_by(ConversationTurn.id).all()
+    if not turns and not (final and state.get('through')):
+        return state
+
+    def full_history():
+        return ''.join(format_turn(turn) for turn in conversation.turns.order_by(ConversationTurn.id))
+
+    assessment_manager.run_incremental_assessments('\n'.join(turn.user_input for turn in turns),
+                                                   [format_turn(turn) for turn in turns], state,
+                                                   full_history=full_history, final=final)
+    if turns:
+        state['through'] = turns[-1].id
+    updated = Conversation.query.filter_by(id=conversation_id, assessment_state=stored) \
+        .update({'assessment_state': json.dumps(state, default=str)}, synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        db.session.expire_all()
+        if final:
+            # The final evaluation must cover everything, whatever the other worker stored.
+            return update_conversation_assessment(conversation_id, final=True)
+        # Another worker folded in the same turns first; keep its state.
+        return json.loads(db.session.get(Conversation, conversation_id).assessment_state)
+    return state
+
+def match_application(job, applicant_id, applicant_profile):
+    """Match a completed application against its job and build the status fields of a /chat reply."""
+    ensure_job_index()
+    applicant = Applicant(id=applicant_id, profile=applicant_profile)
+    matcher_job = to_matcher_job(job)
+    
+    match_result = job_matcher.match_job_applicant(matcher_job, applicant)
+    save_match_result(job, applicant_id, match_result)
+    
+    if match_result['score'] > 0.7:  # You can adjust this threshold
+        save_application(applicant_id, job.id, float(match_result['score']))
+        status = f"Your application has been submitted successfully. The employer will be notified. Match score: {match_result['score']:.2f}"
+        return {'status': status}
+
+    limit = app.config['SIMILAR_JOB_CANDIDATES']
+    candidate_ids = [job_id for job_id, _ in stored_job_scores(applicant_id, limit, exclude={job.id})] \
+        or job_matcher.candidate_job_ids(matcher_job, applicant, limit)
+    candidates = load_matcher_jobs(candidate_ids)
+    similar_jobs = job_matcher.find_similar_jobs(matcher_job, applicant, candidates)
+    status = f"Based on our assessment (match score: {match_result['score']:.2f}), we have some other job recommendations that might be a better fit."
+    return {
+        'status': status, 
+        'similar_jobs': [{'id': j['job'].id, 'title': j['job'].title, 'score': j['score']} for j in similar_jobs[:3]]
+    }
+
+def save_application(applicant_id, job_id, match_score):
+    """File the applicant's application to a job, or update its score if they have already applied."""
+    application = Application.query.filter_by(applicant_id=applicant_id, job_id=job_id).first()
+    if application is None:
+        db.session.add(Application(applicant_id=applicant_id, job_id=job_id, match_score=match_score))
+    else:
+        application.match_score = match_score
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker filed this application first; update theirs instead.
+        db.session.rollback()
+        return save_application(applicant_id, job_id, match_score)
+
+def save_match_result(job, applicant_id, match_result):
+    """Store a match and the conversation assessments so employer views never recompute them."""
+    conversation = Conversation.query.filter_by(applicant_id=applicant_id, job_id=job.id).first()
+    state = update_conversation_assessment(conversation.id, final=True) if conversation else None
+    assessments = {name: state[name] for name in ('technical', 'personality', 'communication')
+                   if state and state.get(name) is not None}
+
+    db.session.add(MatchResult(
+        applicant_id=applicant_id,
+        job_id=job.id,
+        score=float(match_result['score']),
+        skill_similarity=float(match_result['skill_similarity']),
+        reasoning=match_result['reasoning'],
+        assessments=json.dumps(assessments, default=str),
+    ))
+    db.session.commit()
+
+match_task_available = threading.Event()
+match_workers = []
+match_workers_lock = threading.Lock()
+
+def enqueue_match(job, applicant_id, applicant_profile):
+    """Queue matching for an application, reusing a task already queued or running for the same job."""
+    task = MatchTask.query.filter(MatchTask.applicant_id == applicant_id, MatchTask.job_id == job.id,
+                                  MatchTask.state.in_(('queued', 'running'))).order_by(MatchTask.id).first()
+    if task is None:
+        task = MatchTask(applicant_id=applicant_id, job_id=job.id, applicant_profile=applicant_profile, state='queued')
+        db.session.add(task)
+    elif task.state == 'queued':
+        task.applicant_profile = applicant_profile
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request queued a task for this application first; reuse it.
+        db.session.rollback()
+        return enqueue_match(job, applicant_id, applicant_profile)
+    save_applicant_profile(applicant_id, applicant_profile)
+    start_match_workers()
+    match_task_available.set()
+    return task
+
+def application_outcome(job, assessment):
+    """Queue matching for a completed application and return the pending status fields of a /chat reply."""
+    if not assessment.get('application_complete', False):
+        return {'status': None}
+    task = enqueue_match(job, session['user_id'], assessment.get('applicant_profile', ''))
+    return {
+        'status': "Thanks! We're reviewing your application now.",
+        'match_task_id': task.id,
+    }
+
+def claim_match_task():
+    """Atomically move the oldest queued task to 'running', requeueing tasks abandoned by dead workers."""
+    stale_before = datetime.utcnow() - timedelta(seconds=app.config['MATCH_TASK_TIMEOUT'])
+    MatchTask.query.filter(MatchTask.state == 'running', MatchTask.updated_at < stale_before) \
+        .update({'state': 'queued'}, synchronize_session=False)
+    db.session.commit()
+
+    while True:
+        task = MatchTask.query.filter_by(state='queued').order_by(MatchTask.id).first()
+        if task is None:
+            return None
+        claimed = MatchTask.query.filter_by(id=task.id, state='queued') \
+            .update({'state': 'running', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            db.session.refresh(task)
+            return task
+
+def heartbeat_match_task(task_id, stop_event):
+    """Renew a running task's lease until stop_event is set, so slow LLM calls aren't mistaken for a dead worker."""
+    while not stop_event.wait(app.config['MATCH_TASK_TIMEOUT'] / 3):
+        with app.app_context():
+            try:
+                MatchTask.query.filter_by(id=task_id, state='running') \
+                    .update({'updated_at': datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Renewing match task %s failed", task_id)
+            finally:
+                db.session.remove()
+
+def run_match_task(task):
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=heartbeat_match_task, args=(task.id, stop_heartbeat), daemon=True).start()
+    try:
+        process_match_task(task)
+    finally:
+        stop_heartbeat.set()
+
+def process_match_task(task):
+    try:
+        job = db.session.get(Job, task.job_id)
+        if job is None:
+            raise LookupError(f"Job {task.job_id} no longer exists")
+        result = match_application(job, task.applicant_id, task.applicant_profile)
+        task.state = 'done'
+        task.result = json.dumps(result)
+    except SchedulerBusy as e:
+        # The LLM is saturated; put the task back rather than failing the application.
+        db.session.rollback()
+        task.state = 'queued'
+        db.session.commit()
+        time.sleep(e.retry_after or 1)
+        return
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception("Match task %s failed", task.id)
+        task.state = 'failed'
+        task.error = str(e)
+    db.session.commit()
+
+def match_worker(stop_event, poll_interval=5):
+    """Process queued match tasks until stop_event is set."""
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                task = claim_match_task()
+                if task is not None:
+                    run_match_task(task)
+                    continue
+            except Exception:
+                app.logger.exception("Match worker error")
+            finally:
+                db.session.remove()
+        match_task_available.wait(poll_interval)
+        match_task_available.clear()
+
+def start_match_workers():
+    """Start the in-process match worker threads on first use."""
+    with match_workers_lock:
+        if match_workers or app.config['MATCH_WORKERS'] <= 0:
+            return
+        stop_event = threading.Event()
+        for i in range(app.config['MATCH_WORKERS']):
+            worker = threading.Thread(target=match_worker, args=(stop_event,), name=f'match-worker-{i}', daemon=True)
+            worker.start()
+            match_workers.append(worker)
+
+score_refresh_pending = set()
+score_refresh_available = threading.Event()
+score_refresh_lock = threading.Lock()
+score_refreshers = []
+
+def save_applicant_profile(applicant_id, profile):
+    """Keep the applicant's latest profile and refresh their stored job scores if it changed."""
+    record = db.session.get(ApplicantProfile, applicant_id)
+    if record is None:
+        db.session.add(ApplicantProfile(applicant_id=applicant_id, profile=profile))
+    elif record.profile != profile:
+        record.profile = profile
+        record.skills = None
+    else:
+        return
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request created this applicant's profile first; update theirs instead.
+        db.session.rollback()
+        return save_applicant_profile(applicant_id, profile)
+    schedule_score_refresh('applicant', applicant_id)
+
+def stored_job_scores(applicant_id, limit, exclude=()):
+    """The applicant's best precomputed job matches as (job_id, score) pairs, best first."""
+    query = MatchScore.query.filter_by(applicant_id=applicant_id)
+    if exclude:
+        query = query.filter(MatchScore.job_id.notin_(exclude))
+    return [(row.job_id, row.score) for row in query.order_by(MatchScore.score.desc()).limit(limit)]
+
+def refresh_applicant_scores(applicant_id):
+    """Recompute one applicant's stored top-K jobs from their profile skills."""
+    record = db.session.get(ApplicantProfile, applicant_id)
+    if record is None:
+        return
+    if record.skills is None:
+        record.skills = job_matcher.skills_text(record.profile)
+    ensure_job_index()
+    top = job_matcher.job_index.top_k(record.skills, app.config['MATCH_SCORE_TOP_K'])
+    MatchScore.query.filter_by(applicant_id=applicant_id).delete(synchronize_session=False)
+    db.session.add_all([MatchScore(applicant_id=applicant_id, job_id=job_id, score=score)
+                        for job_id, score in top if score > 0])
+    db.session.commit()
+
+def refresh_job_scores(job_id, batch_size=1000):
+    """Merge a new or edited job into the stored top-K of every applicant it now ranks for."""
+    k = app.config['MATCH_SCORE_TOP_K']
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return
+    ensure_job_index()
+    # Indexed here rather than in the request that saved the job: it may need a skill extraction call.
+    job_matcher.index_job(to_matcher_job(job))
+    previous = {row.applicant_id for row in MatchScore.query.filter_by(job_id=job_id).with_entities(MatchScore.applicant_id)}
+    MatchScore.query.filter_by(job_id=job_id).delete(synchronize_session=False)
+    current = {
+        row.applicant_id: (row.count, row.lowest)
+        for row in db.session.query(MatchScore.applicant_id, func.count().label('count'),
+                                    func.min(MatchScore.score).label('lowest')).group_by(MatchScore.applicant_id)
+    }
+    profiles = ApplicantProfile.query.filter(ApplicantProfile.skills.isnot(None)) \
+        .with_entities(ApplicantProfile.applicant_id, ApplicantProfile.skills).all()
+
+    new_scores = []
+    for start in range(0, len(profiles), batch_size):
+        batch = profiles[start:start + batch_size]
+        scores = job_matcher.job_index.job_scores(job_id, [profile.skills for profile in batch])
+        for profile, score in zip(batch, scores):
+            count, lowest = current.get(profile.applicant_id, (0, 0.0))
+            if score > 0 and (count < k or score > lowest):
+                new_scores.append(MatchScore(applicant_id=profile.applicant_id, job_id=job_id, score=float(score)))
+    db.session.add_all(new_scores)
+    db.session.flush()
+    trim_match_scores(k)
+    db.session.commit()
+    # Applicants the job dropped out for have a free slot; refill it from the index.
+    for applicant_id in previous - {score.applicant_id for score in new_scores}:
+        schedule_score_refresh('applicant', applicant_id)
+
+def trim_match_scores(k, batch_size=500):
+    """Delete stored scores beyond each applicant's k best."""
+    crowded = db.session.query(MatchScore.applicant_id).group_by(MatchScore.applicant_id).having(func.count() > k)
+    rank = func.row_number().over(partition_by=MatchScore.applicant_id,
+                                  order_by=(MatchScore.score.desc(), MatchScore.job_id)).label('rank')
+    ranked = db.session.query(MatchScore.applicant_id, MatchScore.job_id, rank) \
+        .filter(MatchScore.applicant_id.in_(crowded)).subquery()
+    overflow = [tuple(row) for row in db.session.query(ranked.c.applicant_id, ranked.c.job_id).filter(ranked.c.rank > k)]
+    for start in range(0, len(overflow), batch_size):
+        MatchScore.query.filter(tuple_(MatchScore.applicant_id, MatchScore.job_id).in_(overflow[start:start + batch_size])) \
+            .delete(synchronize_session=False)
+
+def schedule_score_refresh(kind, object_id):
+    """Queue a background refresh of stored scores for a 'job', an 'applicant' or 'all' applicants,
+    or of a conversation's running 'assessment'."""
+    with score_refresh_lock:
+        score_refresh_pending.add((kind, object_id))
+    start_score_refresher()
+    score_refresh_available.set()
+
+def run_score_refresh(kind, object_id):
+    if kind == 'all':
+        refresh_all_scores()
+    elif kind == 'job':
+        refresh_job_scores(object_id)
+    elif kind == 'assessment':
+        update_conversation_assessment(object_id)
+    else:
+        refresh_applicant_scores(object_id)
+
+def score_refresher(poll_interval=30):
+    """Drain the score refresh queue; repeated requests for the same object are merged."""
+    while True:
+        score_refresh_available.wait(poll_interval)
+        score_refresh_available.clear()
+        while True:
+            with score_refresh_lock:
+                if not score_refresh_pending:
+                    break
+                kind, object_id = score_refresh_pending.pop()
+            with app.app_context():
+                try:
+                    run_score_refresh(kind, object_id)
+                except SchedulerBusy as e:
+                    db.session.rollback()
+                    with score_refresh_lock:
+                        score_refresh_pending.add((kind, object_id))
+                    time.sleep(e.retry_after or 1)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Refreshing scores for %s %s failed", kind, object_id)
+                finally:
+                    db.session.remove()
+
+def start_score_refresher():
+    with score_refresh_lock:
+        if score_refreshers:
+            return
+        refresher = threading.Thread(target=score_refresher, name='score-refresher', daemon=True)
+        refresher.start()
+        score_refreshers.append(refresher)
+
+def refresh_all_scores():
+    """Rebuild every applicant's stored top-K job scores; returns how many applicants were refreshed."""
+    ensure_job_index()
+    applicant_ids = [row.applicant_id for row in ApplicantProfile.query.with_entities(ApplicantProfile.applicant_id)]
+    for applicant_id in applicant_ids:
+        refresh_applicant_scores(applicant_id)
+    return len(applicant_ids)
+
+@app.cli.command('refresh-match-scores')
+def refresh_match_scores_command():
+    """Rebuild every applicant's stored top-K job scores."""
+    print(f"Refreshed scores for {refresh_all_scores()} applicants.")
+
+@app.cli.command('match-worker')
+def match_worker_command():
+    """Run a standalone match worker that drains the match task queue."""
+    match_worker(threading.Event())
+
+CHAT_HISTORY_DISPLAY_TURNS = 50
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+def format_turn(turn):
+    return f"User: {turn.user_input}\nBot: {turn.response}\n"
+
+def get_conversation(applicant_id, job_id):
+    conversation = Conversation.query.filter_by(applicant_id=applicant_id, job_id=job_id).first()
+    if conversation is None:
+        db.session.add(Conversation(applicant_id=applicant_id, job_id=job_id, summary='', summarized_through=0))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request started this conversation first; use theirs.
+            db.session.rollback()
+        conversation = Conversation.query.filter_by(applicant_id=applicant_id, job_id=job_id).one()
+    return conversation
+
+def history_window(conversation):
+    """Split a conversation's unsummarized turns into (window, overflow).
+
+    The window is the newest turns, as prompt text, that fit in
+    CONVERSATION_TOKEN_BUDGET next to the stored running summary; older
+    turns that no longer fit overflow and get folded into the summary, so
+    each turn is summarized once and only unsummarized turns are loaded.
+    """
+    budget = app.config['CONVERSATION_TOKEN_BUDGET']
+    turns = conversation.turns.filter(ConversationTurn.id > conversation.summarized_through) \
+        .order_by(ConversationTurn.id).all()
+
+    window, used = [], estimate_tokens(conversation.summary)
+    for turn in reversed(turns):
+        text = format_turn(turn)
+        if window and used + estimate_tokens(text) > budget:
+            break
+        window.insert(0, text)
+        used += estimate_tokens(text)
+    return window, turns[:len(turns) - len(window)]
+
+def format_history(summary, window):
+    history = ''.join(window)
+    if summary:
+        history = f"Summary of earlier conversation: {summary}\n{history}"
+    return history
+
+def record_turn(conversation_id, user_input, response):
+    db.session.add(ConversationTurn(conversation_id=conversation_id, user_input=user_input, response=response))
+    db.session.commit()
+
+def load_chat_request():
+    data = request.json
+    job = Job.query.get(data.get('job_id'))
+    return data.get('user_input', ''), job
+
+def prepare_chat():
+    """Database work of a chat request before any LLM call.
+
+    Returns (error response, None), or (None, state) where state holds the
+    plain values the rest of the request needs, so that the async handler
+    in asgi.py can carry it between threads and request contexts. If
+    state['overflow'] is set, summarize it and pass the summary to
+    save_history_summary before building the prompt with chat_history.
+    """
+    if session.get('role') != 'applicant':
+        return (jsonify({"error": "Access denied"}), 403), None
+
+    user_input, job = load_chat_request()
+    if not job:
+        return (jsonify({"error": "Job not found"}), 404), None
+
+    conversation = get_conversation(session['user_id'], job.id)
+    window, overflow = history_window(conversation)
+    return None, {
+        'job_id': job.id,
+        'job_details': f"Job Title: {job.title}\nDescription: {job.description}",
+        'user_input': user_input,
+        'conversation_id': conversation.id,
+        'summary': conversation.summary,
+        'window': window,
+        'overflow': ''.join(format_turn(turn) for turn in overflow),
+        'summarized_through': overflow[-1].id if overflow else None,
+    }
+
+def save_history_summary(state, summary):
+    Conversation.query.filter_by(id=state['conversation_id']) \
+        .update({'summary': summary, 'summarized_through': state['summarized_through']}, synchronize_session=False)
+    db.session.commit()
+    state['summary'] = summary
+
+def chat_history(state):
+    return format_history(state['summary'], state['window'])
+
+def finish_chat(state, response, assessment):
+    """Record the exchange and return the /chat reply payload."""
+    record_turn(state['conversation_id'], state['user_input'], response)
+    schedule_score_refresh('assessment', state['conversation_id'])
+    return {'response': response, **application_outcome(db.session.get(Job, state['job_id']), assessment)}
 
 @app.route('/chat', methods=['POST'])
 @login_required
 def chat():
+    error, state = prepare_chat()
+    if error is not None:
+        return error
+    if state['overflow']:
+        save_history_summary(state, tool.summarize_history(state['summary'], state['overflow']))
+
+    response, assessment = tool.process_interaction(chat_history(state), state['user_input'], state['job_details'])
+    return jsonify(finish_chat(state, response, assessment))
+
+@app.route('/chat/history/<int:job_id>')
+@login_required
+def chat_history_turns(job_id):
+    """The latest turns of the applicant's conversation about a job, oldest first, for redisplay."""
     if session.get('role') != 'applicant':
         return jsonify({"error": "Access denied"}), 403
-    
-    data = request.json
-    chat_history = data.get('history', '')
-    user_input = data.get('user_input', '')
-    job_id = data.get('job_id')
-    
-    job = Job.query.get(job_id)
-    if not job:
-        return jsonify({"error": "Job not found"}), 404
-    
-    job_details = f"Job Title: {job.title}\nDescription: {job.description}"
-    
-    response, assessment = tool.process_interaction(chat_history, user_input, job_details)
-    
-    if assessment.get('application_complete', False):
-        applicant = Applicant(id=session['user_id'], profile=assessment.get('applicant_profile', ''))
-        matcher_job = MatcherJob(id=job.id, title=job.title, description=job.description)
-        
-        match_result = job_matcher.match_job_applicant(matcher_job, applicant)
-        
-        if match_result['score'] > 0.7:  # You can adjust this threshold
-            new_application = Application(applicant_id=session['user_id'], job_id=job.id)
-            db.session.add(new_application)
-            db.session.commit()
-            status = f"Your application has been submitted successfully. The employer will be notified. Match score: {match_result['score']:.2f}"
-        else:
-            all_jobs = [MatcherJob(id=j.id, title=j.title, description=j.description) for j in Job.query.all()]
-            similar_jobs = job_matcher.find_similar_jobs(matcher_job, applicant, all_jobs)
-            status = f"Based on our assessment (match score: {match_result['score']:.2f}), we have some other job recommendations that might be a better fit."
-            return jsonify({
-                'response': response, 
-                'status': status, 
-                'similar_jobs': [{'id': j['job'].id, 'title': j['job'].title, 'score': j['score']} for j in similar_jobs[:3]]
-            })
-    
-    return jsonify({'response': response, 'status': status if 'status' in locals() else None})
+    turns = ConversationTurn.query.join(Conversation) \
+        .filter(Conversation.applicant_id == session['user_id'], Conversation.job_id == job_id) \
+        .order_by(ConversationTurn.id.desc()).limit(CHAT_HISTORY_DISPLAY_TURNS).all()
+    return jsonify({'turns': [{'user_input': turn.user_input, 'response': turn.response} for turn in reversed(turns)]})
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+@login_required
+def chat_stream():
+    """Server-Sent Events variant of /chat.
+
+    Emits 'token' events with pieces of the reply as they are generated and a
+    final 'done' event carrying the same payload /chat returns.
+    """
+    error, state = prepare_chat()
+    if error is not None:
+        return error
+    if state['overflow']:
+        save_history_summary(state, tool.summarize_history(state['summary'], state['overflow']))
+
+    def generate():
+        try:
+            for event, payload in tool.stream_interaction(chat_history(state), state['user_input'], state['job_details']):
+                if event == 'token':
+                    yield sse_event('token', {'text': payload})
+                else:
+                    response, assessment = payload
+                    yield sse_event('done', finish_chat(state, response, assessment))
+        except Exception:
+            app.logger.exception("Streaming chat failed")
+            yield sse_event('error', {'error': 'An error occurred. Please try again.'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/match_status/<int:task_id>')
+@login_required
+def match_status(task_id):
+    task = MatchTask.query.get_or_404(task_id)
+    if task.applicant_id != session['user_id']:
+        return jsonify({"error": "Access denied"}), 403
+    payload = {'state': task.state}
+    if task.state == 'done':
+        payload.update(json.loads(task.result))
+    elif task.state == 'failed':
+        payload['status'] = "We couldn't finish reviewing your application. Please try again later."
+    return jsonify(payload)
+
+APPLICANT_SORT_COLUMNS = {
+    'date': Application.application_date,
+    'score': func.coalesce(Application.match_score, -1.0),
+    'status': Application.status,
+}
+APPLICANT_SORT_FIELDS = {'date': 'application_date', 'score': 'match_score', 'status': 'status'}
+
+def encode_cursor(value, last_id):
+    """Encode a keyset pagination position (sort value, row id) for use in a URL."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, last_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort):
+    value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    if sort == 'date':
+        value = datetime.fromisoformat(value)
+    elif sort == 'score':
+        value = -1.0 if value is None else float(value)
+    return value, int(last_id)
 
 @app.route('/view_applicants/<int:job_id>')
 @login_required
@@ -326,18 +1522,84 @@ def view_applicants(job_id):
         flash('Access denied.', 'danger')
         return redirect(url_for('employer_dashboard'))
     
-    applications = Application.query.filter_by(job_id=job_id).all()
-    applicants = []
-    for application in applications:
-        applicant = User.query.get(application.applicant_id)
-        applicants.append({
-            'id': applicant.id,
-            'email': applicant.email,
-            'status': application.status,
-            'application_date': application.application_date
-        })
+    sort = request.args.get('sort', 'date')
+    if sort not in APPLICANT_SORT_COLUMNS:
+        sort = 'date'
+    descending = request.args.get('order', 'desc') != 'asc'
+    status = request.args.get('status') or None
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+    sort_column = APPLICANT_SORT_COLUMNS[sort]
+
+    query = db.session.query(
+        Application.id,
+        Application.status,
+        Application.application_date,
+        Application.match_score,
+        User.id.label('applicant_id'),
+        User.email,
+    ).join(User, User.id == Application.applicant_id).filter(Application.job_id == job_id)
+    if status:
+        query = query.filter(Application.status == status)
+
+    cursor = request.args.get('after')
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor, sort)
+        except (ValueError, TypeError):
+            value, last_id = None, None
+        if last_id is not None:
+            if descending:
+                query = query.filter(or_(sort_column < value, and_(sort_column == value, Application.id < last_id)))
+            else:
+                query = query.filter(or_(sort_column > value, and_(sort_column == value, Application.id > last_id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), Application.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Application.id.asc())
+    rows = query.limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, APPLICANT_SORT_FIELDS[sort]), last.id)
+
+    applicants = [{
+        'id': row.applicant_id,
+        'email': row.email,
+        'status': row.status,
+        'application_date': row.application_date,
+        'match_score': row.match_score,
+    } for row in rows]
     
-    return render_template('view_applicants.html', job=job, applicants=applicants)
+    return render_template('view_applicants.html', job=job, applicants=applicants, sort=sort,
+                           order='desc' if descending else 'asc', status=status, per_page=per_page,
+                           next_cursor=next_cursor)
+
+@app.route('/best_candidates/<int:job_id>')
+@login_required
+def best_candidates(job_id):
+    if session.get('role') != 'employer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('home'))
+
+    job = Job.query.get_or_404(job_id)
+    if job.employer_id != session['user_id']:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('employer_dashboard'))
+
+    # Only applicants who have applied to one of this employer's jobs: everyone else's contact
+    # details and profile are not this employer's to see.
+    own_applicants = db.session.query(Application.applicant_id) \
+        .join(Job, Job.id == Application.job_id).filter(Job.employer_id == job.employer_id)
+    candidates = db.session.query(User.id, User.email, MatchScore.score, ApplicantProfile.profile) \
+        .join(MatchScore, MatchScore.applicant_id == User.id) \
+        .outerjoin(ApplicantProfile, ApplicantProfile.applicant_id == User.id) \
+        .filter(MatchScore.job_id == job.id, User.id.in_(own_applicants)) \
+        .order_by(MatchScore.score.desc()) \
+        .limit(app.config['BEST_CANDIDATES_LIMIT']).all()
+    return render_template('best_candidates.html', job=job, candidates=candidates)
 
 @app.route('/view_assessment/<int:job_id>/<int:applicant_id>')
 @login_required
@@ -354,13 +1616,16 @@ def view_assessment(job_id, applicant_id):
     applicant = User.query.get_or_404(applicant_id)
     application = Application.query.filter_by(job_id=job_id, applicant_id=applicant_id).first_or_404()
     
-    # Here you would typically fetch or generate the assessment details
-    # For now, we'll just use placeholder data
-    assessment = {
-        'score': 0.75,
-        'reasoning': 'This is a placeholder assessment reasoning.',
-        'skill_similarity': 0.8
-    }
+    match_result = MatchResult.query.filter_by(job_id=job_id, applicant_id=applicant_id) \
+        .order_by(MatchResult.id.desc()).first()
+    assessment = None
+    if match_result:
+        assessment = {
+            'score': match_result.score,
+            'reasoning': match_result.reasoning,
+            'skill_similarity': match_result.skill_similarity,
+            'details': json.loads(match_result.assessments or '{}'),
+        }
     
     return render_template('view_assessment.html', job=job, applicant=applicant, application=application, assessment=assessment)
 
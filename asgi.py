@@ -0,0 +1,211 @@
+"""ASGI entry point, e.g. `uvicorn asgi:application --workers 2`.
+
+POST /chat runs as a coroutine: its short database steps run on a thread
+pool and its LLM calls wait for a scheduler slot without holding a thread
+(see LLMScheduler.run_async), so one worker process can keep hundreds of
+chats in flight. Every other request, and any /chat request the async path
+cannot answer itself (not logged in, bad job id), is passed to the Flask app
+unchanged through a small WSGI bridge on the same thread pool.
+
+app:app remains a plain WSGI application for `flask run` and WSGI servers.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, session
+
+import instrumentation
+from app import app, chat_history, finish_chat, prepare_chat, save_history_summary, scheduler_busy, tool
+from llm_scheduler import SchedulerBusy
+
+logger = logging.getLogger(__name__)
+
+MAX_MEMORY_BODY = 1024 * 1024
+
+executor = ThreadPoolExecutor(max_workers=app.config['ASGI_THREADS'], thread_name_prefix='asgi')
+
+
+async def in_thread(fn, *args):
+    """Run fn on the worker pool, keeping the caller's context (request profile, LLM call attribution)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, contextvars.copy_context().run, fn, *args)
+
+
+async def read_body(receive):
+    """Buffer the request body, spilling large uploads to disk."""
+    body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    body.seek(0)
+    return body
+
+
+def wsgi_environ(scope, body):
+    body.seek(0)
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').upper().replace('-', '_'), value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+async def call_flask(scope, body, send):
+    """Serve the request with the Flask app on the worker pool, streaming its response body."""
+    # One context for the whole response, so generators using stream_with_context
+    # see the same request context on whichever thread resumes them.
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    def next_chunk(chunks):
+        for chunk in chunks:
+            if chunk:
+                return chunk
+        return None
+
+    result = await loop.run_in_executor(executor, context.run, app, wsgi_environ(scope, body), start_response)
+    chunks = iter(result)
+    try:
+        chunk = await loop.run_in_executor(executor, context.run, next_chunk, chunks)
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        while chunk is not None:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            chunk = await loop.run_in_executor(executor, context.run, next_chunk, chunks)
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(executor, context.run, result.close)
+
+
+async def send_response(send, status, body, headers=()):
+    profile = instrumentation.current_profile()
+    if app.config['PROFILE_REQUESTS'] and profile is not None:
+        headers = [*headers, ('Server-Timing', profile.server_timing()), ('X-Profile', json.dumps(profile.summary()))]
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode('latin-1')),
+        *((name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def in_request(scope, body, fn, *args):
+    """Run fn inside a Flask request context for this request, on the worker pool."""
+    def run():
+        with app.request_context(wsgi_environ(scope, body)):
+            return fn(*args)
+    return in_thread(run)
+
+
+def start_chat():
+    # Leave missing logins and bodies that aren't JSON to Flask's redirect and 400/415 responses.
+    if 'user_id' not in session or request.get_json(silent=True) is None:
+        return None
+    error, state = prepare_chat()
+    return state
+
+
+async def chat(scope, body, send):
+    """Async /chat: the same steps as app.chat, with the LLM calls awaited."""
+    if not tool.is_loaded:
+        await in_thread(getattr, tool, 'lm')
+    state = await in_request(scope, body, start_chat)
+    if state is None:
+        # Let Flask produce the redirect or error response.
+        await call_flask(scope, body, send)
+        return None
+
+    if state['overflow']:
+        summary = await tool.asummarize_history(state['summary'], state['overflow'])
+        await in_request(scope, body, save_history_summary, state, summary)
+    response, assessment = await tool.aprocess_interaction(chat_history(state), state['user_input'],
+                                                           state['job_details'])
+    payload = await in_request(scope, body, finish_chat, state, response, assessment)
+    await send_response(send, 200, json.dumps(payload).encode('utf-8'))
+    return 200
+
+
+async def error_response(send, error):
+    if isinstance(error, SchedulerBusy):
+        with app.app_context():
+            payload, status, headers = scheduler_busy(error)
+            body = payload.get_data()
+    else:
+        logger.exception("Async chat failed", exc_info=error)
+        status, headers = 500, {}
+        body = json.dumps({'error': 'An error occurred. Please try again.'}).encode('utf-8')
+    await send_response(send, status, body, headers.items())
+    return status
+
+
+async def handle_chat(scope, receive, send):
+    token = instrumentation.start_profile()
+    status = None
+    try:
+        body = await read_body(receive)
+        try:
+            status = await chat(scope, body, send)
+        except Exception as e:
+            status = await error_response(send, e)
+    finally:
+        profile = instrumentation.finish_profile(token)
+        if status is not None:
+            instrumentation.inc('http_requests_total', endpoint='chat', status=status)
+            instrumentation.observe('http_request_seconds', time.perf_counter() - profile.started, endpoint='chat')
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] != 'http':
+        raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+    elif scope['method'] == 'POST' and scope['path'] == '/chat':
+        await handle_chat(scope, receive, send)
+    else:
+        await call_flask(scope, await read_body(receive), send)
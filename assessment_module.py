@@ -1,14 +1,42 @@
-import dspy
+import logging
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from code_fingerprint import code_fingerprint, precheck
+from lm_provider import chain_of_thought
+
+logger = logging.getLogger(__name__)
 
 class TechnicalAssessment:
-    def __init__(self, lm):
+    def __init__(self, lm, cache=None, max_code_chars=20000):
         self.lm = lm
-        self.assess_code = dspy.ChainOfThought("code: str, language: str -> assessment: str, score: int")
-        self.generate_question = dspy.ChainOfThought("job_details: str, difficulty: str -> question: str")
+        self.cache = cache
+        self.max_code_chars = max_code_chars
+        self.assess_code = chain_of_thought("code: str, language: str -> assessment: str, score: int",
+                                            name='technical_assessment')
+        self.generate_question = chain_of_thought("job_details: str, difficulty: str -> question: str",
+                                                  name='coding_question')
 
     def evaluate_code(self, code, language):
+        """Assess code, scoring 0 without an LLM call if it fails the local pre-checks.
+
+        Results are cached by code fingerprint, so resubmitting the same code with
+        different formatting, comments or local names reuses the first assessment.
+        """
+        rejection = precheck(code, language, self.max_code_chars)
+        if rejection is not None:
+            return rejection, 0
+
+        key = 'technical:' + code_fingerprint(code, language)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached['assessment'], cached['score']
+
         result = self.assess_code(code=code, language=language)
+        if self.cache is not None:
+            self.cache.set(key, {'assessment': result.assessment, 'score': result.score})
         return result.assessment, result.score
 
     def generate_coding_question(self, job_details, difficulty='medium'):
@@ -18,44 +46,144 @@ class TechnicalAssessment:
 class PersonalityAssessment:
     def __init__(self, lm):
         self.lm = lm
-        self.assess_personality = dspy.ChainOfThought("conversation_history: str -> traits: list, assessment: str")
+        self.assess_personality = chain_of_thought("conversation_history: str -> traits: list, assessment: str",
+                                                   name='personality_assessment')
+        self.update_personality = chain_of_thought("previous_assessment: str, new_turns: str -> traits: list, assessment: str",
+                                                  name='personality_update')
 
     def evaluate_personality(self, conversation_history):
         result = self.assess_personality(conversation_history=conversation_history)
         return result.traits, result.assessment
 
+    def update_assessment(self, previous_assessment, new_turns):
+        result = self.update_personality(previous_assessment=previous_assessment, new_turns=new_turns)
+        return result.traits, result.assessment
+
 class CommunicationAssessment:
     def __init__(self, lm):
         self.lm = lm
-        self.assess_communication = dspy.ChainOfThought("conversation_history: str -> clarity: int, coherence: int, assessment: str")
+        self.assess_communication = chain_of_thought("conversation_history: str -> clarity: int, coherence: int, assessment: str",
+                                                     name='communication_assessment')
+        self.update_communication = chain_of_thought("previous_assessment: str, new_turns: str -> clarity: int, coherence: int, assessment: str",
+                                                    name='communication_update')
 
     def evaluate_communication(self, conversation_history):
         result = self.assess_communication(conversation_history=conversation_history)
         return result.clarity, result.coherence, result.assessment
 
+    def update_assessment(self, previous_assessment, new_turns):
+        result = self.update_communication(previous_assessment=previous_assessment, new_turns=new_turns)
+        return result.clarity, result.coherence, result.assessment
+
 class AssessmentManager:
-    def __init__(self, lm):
-        self.technical = TechnicalAssessment(lm)
+    def __init__(self, lm, max_workers=3, timeout=60, full_every=10, code_cache=None, max_code_chars=20000):
+        self.technical = TechnicalAssessment(lm, cache=code_cache, max_code_chars=max_code_chars)
         self.personality = PersonalityAssessment(lm)
         self.communication = CommunicationAssessment(lm)
+        self.timeout = timeout
+        self.full_every = full_every
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='assessment')
 
-    def run_assessments(self, user_input, conversation_history, job_details):
-        assessments = {}
+    def _technical_assessment(self, code, language):
+        assessment, score = self.technical.evaluate_code(code, language)
+        return {'assessment': assessment, 'score': score}
 
-        # Technical assessment
+    def _personality_assessment(self, conversation_history):
+        traits, personality_assessment = self.personality.evaluate_personality(conversation_history)
+        return {'traits': traits, 'assessment': personality_assessment}
+
+    def _communication_assessment(self, conversation_history):
+        clarity, coherence, communication_assessment = self.communication.evaluate_communication(conversation_history)
+        return {'clarity': clarity, 'coherence': coherence, 'assessment': communication_assessment}
+
+    def _personality_update(self, previous, new_turns):
+        previous_text = f"Traits: {previous['traits']}\n{previous['assessment']}"
+        traits, personality_assessment = self.personality.update_assessment(previous_text, new_turns)
+        return {'traits': traits, 'assessment': personality_assessment}
+
+    def _communication_update(self, previous, new_turns):
+        previous_text = f"Clarity: {previous['clarity']}, Coherence: {previous['coherence']}\n{previous['assessment']}"
+        clarity, coherence, communication_assessment = self.communication.update_assessment(previous_text, new_turns)
+        return {'clarity': clarity, 'coherence': coherence, 'assessment': communication_assessment}
+
+    def _submit_technical(self, user_input, tasks):
         if re.search(r'```\w+', user_input):
             code_match = re.search(r'```(\w+)\n([\s\S]+?)\n```', user_input)
             if code_match:
                 language, code = code_match.groups()
-                assessment, score = self.technical.evaluate_code(code, language)
-                assessments['technical'] = {'assessment': assessment, 'score': score}
+                tasks['technical'] = self.executor.submit(self._technical_assessment, code, language)
+
+    def _collect(self, tasks, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        assessments = {}
+        for name, future in tasks.items():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                assessments[name] = future.result(timeout=remaining)
+            except TimeoutError:
+                future.cancel()
+                assessments[name] = {'error': 'Assessment timed out'}
+            except Exception as e:
+                logger.exception("%s assessment failed", name)
+                assessments[name] = {'error': str(e)}
+        return assessments
+
+    def run_assessments(self, user_input, conversation_history, job_details, timeout=None):
+        """Run the independent assessments concurrently.
+
+        Each assessment is isolated: one that raises or misses the timeout is
+        reported as {'error': ...} under its key without affecting the others.
+        """
+        tasks = {}
+
+        # Technical assessment
+        self._submit_technical(user_input, tasks)
 
         # Personality assessment
-        traits, personality_assessment = self.personality.evaluate_personality(conversation_history)
-        assessments['personality'] = {'traits': traits, 'assessment': personality_assessment}
+        tasks['personality'] = self.executor.submit(self._personality_assessment, conversation_history)
 
         # Communication assessment
-        clarity, coherence, communication_assessment = self.communication.evaluate_communication(conversation_history)
-        assessments['communication'] = {'clarity': clarity, 'coherence': coherence, 'assessment': communication_assessment}
+        tasks['communication'] = self.executor.submit(self._communication_assessment, conversation_history)
+
+        return self._collect(tasks, timeout)
+
+    @staticmethod
+    def new_state():
+        """Running assessment state for one conversation, kept by the caller between turns (JSON-serializable)."""
+        return {'turns': 0, 'turns_since_full': 0, 'technical': None, 'personality': None, 'communication': None}
+
+    def run_incremental_assessments(self, user_input, new_turns, state, full_history=None, final=False, timeout=None):
+        """Update a conversation's running assessment from only the turns since the last checkpoint.
+
+        new_turns is a list of transcript strings. A full re-evaluation over
+        full_history (a transcript or a callable returning one, so it is only
+        loaded when needed) runs when final is set, every full_every turns, or
+        when there is no previous assessment to build on. state is updated in
+        place, keeping the latest successful result of each assessment; the
+        returned dict has the same shape as run_assessments.
+        """
+        state['turns'] += len(new_turns)
+        state['turns_since_full'] += len(new_turns)
+        full = (final or state['personality'] is None or state['communication'] is None
+                or state['turns_since_full'] >= self.full_every)
+
+        tasks = {}
+        self._submit_technical(user_input, tasks)
+        if full:
+            history = full_history() if callable(full_history) else full_history
+            history = history if history is not None else ''.join(new_turns)
+            tasks['personality'] = self.executor.submit(self._personality_assessment, history)
+            tasks['communication'] = self.executor.submit(self._communication_assessment, history)
+        else:
+            turns = ''.join(new_turns)
+            tasks['personality'] = self.executor.submit(self._personality_update, state['personality'], turns)
+            tasks['communication'] = self.executor.submit(self._communication_update, state['communication'], turns)
 
-        return assessments
\ No newline at end of file
+        assessments = self._collect(tasks, timeout)
+        for name in assessments:
+            if 'error' not in assessments[name]:
+                state[name] = assessments[name]
+        if full and all('error' not in assessments[name] for name in ('personality', 'communication')):
+            state['turns_since_full'] = 0
+        return assessments
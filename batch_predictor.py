@@ -0,0 +1,158 @@
+"""Answer many items with one LLM call.
+
+A BatchPredictor sends a chunk of items, each tagged with an id, to a
+predictor over a batched signature whose output is a JSON list with one
+object per id. Chunks are limited by item count and by serialized size.
+Objects that fail validation, and ids the completion leaves out, are
+retried one at a time through a single-item fallback; a chunk whose
+completion cannot be used at all is split in half and retried first.
+"""
+import asyncio
+import json
+import logging
+
+from llm_scheduler import SchedulerBusy
+
+logger = logging.getLogger(__name__)
+
+
+def parse_json_objects(text):
+    """Every top-level JSON object found in text, skipping anything that does not parse.
+
+    Tolerates code fences, prose around the list and a completion truncated
+    part way through, keeping the objects that were complete.
+    """
+    text = str(text or '')
+    decoder = json.JSONDecoder()
+    objects, position = [], text.find('{')
+    while position != -1:
+        try:
+            value, end = decoder.raw_decode(text, position)
+        except ValueError:
+            position = text.find('{', position + 1)
+            continue
+        if isinstance(value, dict):
+            objects.append(value)
+        position = text.find('{', end)
+    return objects
+
+
+class BatchPredictor:
+    """Run a batched predictor over {item_id: item} mappings.
+
+    predictor takes items_field (a JSON list of items, each with an "id")
+    plus any shared keyword arguments, and returns output_field. validate
+    turns one returned object into the value for its item or raises
+    ValueError. fallback(item, **shared) answers a single item the slow way;
+    afallback is its coroutine version for arun_chunk (by default fallback
+    runs on a thread).
+    """
+
+    def __init__(self, predictor, items_field, output_field, validate, fallback, max_items=10, max_chars=12000,
+                 afallback=None):
+        self.predictor = predictor
+        self.items_field = items_field
+        self.output_field = output_field
+        self.validate = validate
+        self.fallback = fallback
+        self.afallback = afallback
+        self.max_items = max_items
+        self.max_chars = max_chars
+
+    def chunks(self, items):
+        """Split {item_id: item} into lists of (item_id, item) within max_items and max_chars."""
+        chunk, size = [], 0
+        for item_id, item in items.items():
+            item_size = len(json.dumps(item))
+            if chunk and (len(chunk) >= self.max_items or size + item_size > self.max_chars):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append((item_id, item))
+            size += item_size
+        if chunk:
+            yield chunk
+
+    def __call__(self, items, **shared):
+        results = {}
+        for chunk in self.chunks(items):
+            results.update(self.run_chunk(chunk, **shared))
+        return results
+
+    def run_chunk(self, chunk, **shared):
+        """Results for one chunk as {item_id: value}; items that fail even on their own are left out."""
+        if len(chunk) == 1:
+            return self._single(chunk[0], shared)
+        try:
+            results = self._parse(chunk, self.predictor(**shared, **self._payload(chunk)))
+        except SchedulerBusy:
+            raise
+        except Exception:
+            logger.warning("Batched call for %d items failed", len(chunk), exc_info=True)
+            results = {}
+
+        if not results:
+            half = len(chunk) // 2
+            return {**self.run_chunk(chunk[:half], **shared), **self.run_chunk(chunk[half:], **shared)}
+        for item_id, item in chunk:
+            if item_id not in results:
+                results.update(self._single((item_id, item), shared))
+        return results
+
+    async def arun_chunk(self, chunk, **shared):
+        """Coroutine version of run_chunk; split halves and single-item retries run concurrently."""
+        if len(chunk) == 1:
+            return await self._asingle(chunk[0], shared)
+        try:
+            results = self._parse(chunk, await self.predictor.acall(**shared, **self._payload(chunk)))
+        except SchedulerBusy:
+            raise
+        except Exception:
+            logger.warning("Batched call for %d items failed", len(chunk), exc_info=True)
+            results = {}
+
+        if not results:
+            half = len(chunk) // 2
+            parts = await asyncio.gather(self.arun_chunk(chunk[:half], **shared), self.arun_chunk(chunk[half:], **shared))
+        else:
+            parts = await asyncio.gather(*(self._asingle(entry, shared) for entry in chunk if entry[0] not in results))
+        for part in parts:
+            results.update(part)
+        return results
+
+    def _payload(self, chunk):
+        return {self.items_field: json.dumps([{'id': str(item_id), **item} for item_id, item in chunk])}
+
+    def _parse(self, chunk, prediction):
+        ids = {str(item_id): item_id for item_id, _ in chunk}
+        results = {}
+        for entry in parse_json_objects(getattr(prediction, self.output_field)):
+            item_id = ids.get(str(entry.get('id')))
+            if item_id is None or item_id in results:
+                continue
+            try:
+                results[item_id] = self.validate(entry)
+            except (KeyError, TypeError, ValueError):
+                logger.debug("Invalid batch result for item %s: %r", item_id, entry)
+        return results
+
+    def _single(self, entry, shared):
+        item_id, item = entry
+        try:
+            return {item_id: self.fallback(item, **shared)}
+        except SchedulerBusy:
+            raise
+        except Exception:
+            logger.warning("Single-item call for %s failed", item_id, exc_info=True)
+            return {}
+
+    async def _asingle(self, entry, shared):
+        item_id, item = entry
+        try:
+            if self.afallback is not None:
+                return {item_id: await self.afallback(item, **shared)}
+            return {item_id: await asyncio.to_thread(self.fallback, item, **shared)}
+        except SchedulerBusy:
+            raise
+        except Exception:
+            logger.warning("Single-item call for %s failed", item_id, exc_info=True)
+            return {}
@@ -0,0 +1,222 @@
+"""Offline load benchmark for the chat and matching paths.
+
+Runs against the deterministic local LM backend (LM_BACKEND=local), so no
+network or API key is needed and the numbers measure our own overhead plus
+whatever LM latency is simulated. Measures:
+  * POST /chat through the Flask test client, one applicant per worker thread
+  * JobMatcher.match_job_applicant over the seeded jobs
+  * JobMatcher.get_job_recommendations against the whole job set
+
+and prints throughput and p50/p99 latency for each:
+
+    python benchmarks/load.py --jobs 500 --requests 200 --concurrency 8 --latency 0.05
+
+With --asgi, /chat goes through asgi.application and the matching
+benchmarks use the coroutine methods, with --concurrency requests in flight
+on a single event loop instead of one thread each. The scheduler then caps
+the calls the LM sees, so raise LLM_MAX_CONCURRENCY and LLM_QUEUE_SIZE to
+measure how many chats one worker can hold:
+
+    LLM_MAX_CONCURRENCY=256 LLM_QUEUE_SIZE=1000 python benchmarks/load.py --asgi --concurrency 200 --latency 1
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOPICS = [
+    'python django postgres rest apis', 'java spring microservices kafka', 'python pandas machine learning',
+    'go kubernetes infrastructure terraform', 'react typescript frontend design systems',
+    'rust embedded systems firmware', 'data engineering spark airflow', 'ios swift mobile development',
+]
+MESSAGES = [
+    'What does the team work on day to day?',
+    'I have five years of python and django experience.',
+    'How much of the role is infrastructure work?',
+    'I would like to apply for this position.',
+]
+
+
+def configure_env(tmpdir, args):
+    os.environ['LM_BACKEND'] = 'local'
+    os.environ['LOCAL_LM_LATENCY'] = str(args.latency)
+    os.environ['LOCAL_LM_TOKEN_LATENCY'] = str(args.token_latency)
+    os.environ['LOCAL_LM_COMPLETION_TOKENS'] = str(args.completion_tokens)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    os.environ['SKILL_CACHE_PATH'] = os.path.join(tmpdir, 'skill_cache.db')
+    os.environ['CODE_ASSESSMENT_CACHE_PATH'] = os.path.join(tmpdir, 'code_assessment_cache.db')
+    os.environ['JOB_INDEX_PATH'] = os.path.join(tmpdir, 'job_index')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-placeholder')
+
+
+def seed(app_module, n_jobs, n_applicants):
+    db = app_module.db
+    db.create_all()
+    employer = app_module.User(email='employer@bench.local', role='employer')
+    employer.set_password('bench')
+    db.session.add(employer)
+    applicants = []
+    for i in range(n_applicants):
+        applicant = app_module.User(email=f'applicant{i}@bench.local', role='applicant')
+        applicant.set_password('bench')
+        applicants.append(applicant)
+    db.session.add_all(applicants)
+    db.session.flush()
+    db.session.add_all([
+        app_module.Job(title=f'Engineer {i}', description=f'We are hiring for {TOPICS[i % len(TOPICS)]}. Position {i}.',
+                       employer_id=employer.id, unique_link=f'bench-{i}')
+        for i in range(n_jobs)
+    ])
+    db.session.commit()
+    return [applicant.id for applicant in applicants], [job.id for job in app_module.Job.query.all()]
+
+
+def run(fn, items, concurrency):
+    """Call fn on every item from a thread pool; return (per-call latencies, wall time, errors)."""
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            fn(item)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, items))
+    wall = time.perf_counter() - start
+    return [latency for latency, _ in results], wall, [error for _, error in results if error is not None]
+
+
+def run_async(fn, items, concurrency):
+    """Await fn on every item, at most concurrency at a time; same results as run()."""
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def timed(item):
+            async with limit:
+                start = time.perf_counter()
+                try:
+                    await fn(item)
+                    return time.perf_counter() - start, None
+                except Exception as e:
+                    return time.perf_counter() - start, e
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(item) for item in items))
+        return results, time.perf_counter() - start
+
+    results, wall = asyncio.run(main())
+    return [latency for latency, _ in results], wall, [error for _, error in results if error is not None]
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def report(name, latencies, wall, errors):
+    print(f"  {name:<26} {len(latencies):6d} {len(latencies) / wall:10.1f} "
+          f"{percentile(latencies, 50) * 1000:10.1f} {percentile(latencies, 99) * 1000:10.1f} {len(errors):7d}")
+    if errors:
+        print(f"    first error: {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=100, help='calls per benchmark')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds per LM call')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='simulated seconds per completion token')
+    parser.add_argument('--completion-tokens', type=int, default=60)
+    parser.add_argument('--asgi', action='store_true', help='benchmark the async (ASGI) paths')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        configure_env(tmpdir, args)
+        sys.path.insert(0, REPO_ROOT)
+        import app as app_module
+        from job_matcher import Applicant
+        from lm_provider import get_lm
+
+        # Pay for the dspy import and index build up front so they don't land in the first sample.
+        get_lm()
+
+        with app_module.app.app_context():
+            applicant_ids, job_ids = seed(app_module, args.jobs, args.concurrency)
+            jobs = [app_module.to_matcher_job(job) for job in app_module.Job.query.all()]
+
+        def chat(i):
+            client = clients[i % len(clients)]
+            response = client.post('/chat', json={'user_input': MESSAGES[i % len(MESSAGES)],
+                                                  'job_id': job_ids[i % len(job_ids)]})
+            if response.status_code != 200:
+                raise RuntimeError(f'/chat returned {response.status_code}')
+
+        clients = []
+        for applicant_id in applicant_ids:
+            client = app_module.app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = applicant_id
+                sess['role'] = 'applicant'
+            clients.append(client)
+
+        matcher = app_module.job_matcher
+        matcher.build_job_index(jobs)
+        applicants = [Applicant(i, f'{TOPICS[i % len(TOPICS)]} {MESSAGES[i % len(MESSAGES)]}')
+                      for i in range(len(TOPICS))]
+
+        print(f"{args.jobs} jobs, concurrency {args.concurrency}, "
+              f"simulated LM latency {args.latency * 1000:.0f}ms + {args.token_latency * 1000:.1f}ms/token")
+        print(f"  {'benchmark':<26} {'calls':>6} {'calls/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>7}")
+        if args.asgi:
+            run_asgi(args, app_module, clients, job_ids, matcher, jobs, applicants)
+            return
+        report('/chat', *run(chat, range(args.requests), args.concurrency))
+        report('match_job_applicant', *run(
+            lambda i: matcher.match_job_applicant(jobs[i % len(jobs)], applicants[i % len(applicants)]),
+            range(args.requests), args.concurrency))
+        report('get_job_recommendations', *run(
+            lambda i: matcher.get_job_recommendations(applicants[i % len(applicants)], jobs),
+            range(args.requests), args.concurrency))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_asgi(args, app_module, clients, job_ids, matcher, jobs, applicants):
+    import httpx
+
+    import asgi
+
+    cookies = [client.get_cookie('session').value for client in clients]
+
+    async def chat(i):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.application),
+                                     base_url='http://bench.local') as client:
+            response = await client.post('/chat', json={'user_input': MESSAGES[i % len(MESSAGES)],
+                                                        'job_id': job_ids[i % len(job_ids)]},
+                                         headers={'Cookie': 'session=' + cookies[i % len(cookies)]})
+        if response.status_code != 200:
+            raise RuntimeError(f'/chat returned {response.status_code}')
+
+    report('/chat (asgi)', *run_async(chat, range(args.requests), args.concurrency))
+    report('amatch_job_applicant', *run_async(
+        lambda i: matcher.amatch_job_applicant(jobs[i % len(jobs)], applicants[i % len(applicants)]),
+        range(args.requests), args.concurrency))
+    report('aget_job_recommendations', *run_async(
+        lambda i: matcher.aget_job_recommendations(applicants[i % len(applicants)], jobs),
+        range(args.requests), args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
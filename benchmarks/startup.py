@@ -0,0 +1,114 @@
+"""Cold-start benchmark for the app.
+
+Measures, in fresh interpreter processes:
+  * importing app.py
+  * `flask db upgrade` against an empty SQLite database
+  * gunicorn boot until the first request is served (if gunicorn is installed)
+
+Pass --baseline <git ref> to run the same measurements against another
+revision (checked out into a temporary worktree) and print both side by side:
+
+    python benchmarks/startup.py --baseline HEAD~1
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_env(tmpdir):
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'benchmark-placeholder')
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    env['SKILL_CACHE_PATH'] = os.path.join(tmpdir, 'skill_cache.db')
+    env['CODE_ASSESSMENT_CACHE_PATH'] = os.path.join(tmpdir, 'code_assessment_cache.db')
+    env['JOB_INDEX_PATH'] = os.path.join(tmpdir, 'job_index')
+    env['FLASK_APP'] = 'app.py'
+    return env
+
+
+def timed(cmd, cwd, env):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_gunicorn_boot(cwd, env, timeout=60):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1)
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError('gunicorn did not start serving in time')
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def measure(cwd, repeat):
+    results = {'import app': [], 'flask db upgrade': []}
+    has_gunicorn = shutil.which('gunicorn') is not None
+    if has_gunicorn:
+        results['gunicorn boot'] = []
+
+    for _ in range(repeat):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            env = bench_env(tmpdir)
+            results['import app'].append(timed([sys.executable, '-c', 'import app'], cwd, env))
+            results['flask db upgrade'].append(timed([sys.executable, '-m', 'flask', 'db', 'upgrade'], cwd, env))
+            if has_gunicorn:
+                results['gunicorn boot'].append(time_gunicorn_boot(cwd, env))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return {name: statistics.median(times) for name, times in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', help='git ref to compare against')
+    args = parser.parse_args()
+
+    current = measure(REPO_ROOT, args.repeat)
+    baseline = None
+    if args.baseline:
+        worktree = tempfile.mkdtemp()
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.baseline], cwd=REPO_ROOT,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            baseline = measure(worktree, args.repeat)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPO_ROOT, check=False)
+
+    print(f"median of {args.repeat} runs (seconds)")
+    for name, seconds in current.items():
+        line = f"  {name:<18} {seconds:8.3f}"
+        if baseline and name in baseline:
+            line += f"   baseline {baseline[name]:8.3f}   speedup {baseline[name] / seconds:5.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
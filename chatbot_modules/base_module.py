@@ -1,15 +1,70 @@
-import dspy
+from llm_scheduler import INTERACTIVE
+from lm_provider import chain_of_thought, get_lm, predict
+from response_cache import ResponseCache
+
+def as_bool(value):
+    """Interpret a predictor's boolean output field, which dspy returns as text."""
+    if isinstance(value, str):
+        return value.strip().lower().startswith(('true', 'yes'))
+    return bool(value)
+
+class BaseChatbotModule:
+    def __init__(self, lm):
+        self.lm = lm
+
+    def process(self, history, user_input, job_details):
+        """Return this module's reply to user_input, or None if it does not apply."""
+        raise NotImplementedError
 
 class ModularPrescreeningTool:
     def __init__(self):
-        self.lm = dspy.OpenAI(model="gpt-3.5-turbo")
-        dspy.settings.configure(lm=self.lm)
-        self.generate_response = dspy.ChainOfThought("history: str, user_input: str, job_details: str -> response: str, application_complete: bool, applicant_profile: str")
+        self.lm = get_lm()
+        # Opening questions about a job repeat a lot, so identical input for the same job and history
+        # is served from the cache. Exact matches only: the outputs carry the applicant's profile, and
+        # a near-identical message ("remote" / "not remote", a similar name) must not reuse another's.
+        self.generate_response = chain_of_thought(
+            "history: str, user_input: str, job_details: str -> response: str, application_complete: bool, applicant_profile: str",
+            cache=ResponseCache(), name='generate_response', lane=INTERACTIVE)
+        self.summarize = predict("summary: str, conversation: str -> updated_summary: str",
+                                 name='summarize_history', lane=INTERACTIVE)
 
     def process_interaction(self, history, user_input, job_details):
         result = self.generate_response(history=history, user_input=user_input, job_details=job_details)
+        return self._interaction_result(result)
+
+    async def aprocess_interaction(self, history, user_input, job_details):
+        """Coroutine version of process_interaction for the async request path (see asgi.py)."""
+        result = await self.generate_response.acall(history=history, user_input=user_input, job_details=job_details)
+        return self._interaction_result(result)
+
+    @staticmethod
+    def _interaction_result(result):
         assessment = {
-            'application_complete': result.application_complete,
+            'application_complete': as_bool(result.application_complete),
             'applicant_profile': result.applicant_profile
         }
-        return result.response, assessment
\ No newline at end of file
+        return result.response, assessment
+
+    def summarize_history(self, summary, conversation):
+        """Fold conversation turns into a running summary of the interview so far."""
+        result = self.summarize(summary=summary or "(none yet)", conversation=conversation)
+        return result.updated_summary
+
+    async def asummarize_history(self, summary, conversation):
+        result = await self.summarize.acall(summary=summary or "(none yet)", conversation=conversation)
+        return result.updated_summary
+
+    def stream_interaction(self, history, user_input, job_details):
+        """Streaming counterpart of process_interaction.
+
+        Yields ('token', text) events while the reply is generated, then a single
+        ('assessment', (response, assessment)) event. The reply comes from the
+        same generate_response call /chat makes, streamed, so both give the same
+        answer to the same conversation.
+        """
+        for event, payload in self.generate_response.stream('response', history=history, user_input=user_input,
+                                                            job_details=job_details):
+            if event == 'token':
+                yield 'token', payload
+            else:
+                yield 'assessment', self._interaction_result(payload)
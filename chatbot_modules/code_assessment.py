@@ -1,16 +1,36 @@
 import re
-import dspy
+from code_fingerprint import code_fingerprint, precheck
+from llm_scheduler import INTERACTIVE
+from lm_provider import chain_of_thought
 from .base_module import BaseChatbotModule
 
 class CodeAssessmentModule(BaseChatbotModule):
-    def __init__(self, lm):
+    def __init__(self, lm, cache=None, max_code_chars=20000):
         super().__init__(lm)
-        self.assess_code = dspy.ChainOfThought("code: str, language: str -> assessment: str")
+        self.cache = cache
+        self.max_code_chars = max_code_chars
+        self.assess_code = chain_of_thought("code: str, language: str -> assessment: str",
+                                            name='chat_code_assessment', lane=INTERACTIVE)
 
     def process(self, history, user_input, job_details):
         code_match = re.search(r'```(\w+)\n([\s\S]+?)\n```', user_input)
         if code_match:
             language, code = code_match.groups()
-            assessment = self.assess_code(code=code, language=language)
-            return f"Code Assessment:\n{assessment.assessment}"
-        return None
\ No newline at end of file
+            return f"Code Assessment:\n{self.assess(code, language)}"
+        return None
+
+    def assess(self, code, language):
+        rejection = precheck(code, language, self.max_code_chars)
+        if rejection is not None:
+            return rejection
+
+        key = 'chat:' + code_fingerprint(code, language)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached['assessment']
+
+        assessment = self.assess_code(code=code, language=language).assessment
+        if self.cache is not None:
+            self.cache.set(key, {'assessment': assessment})
+        return assessment
\ No newline at end of file
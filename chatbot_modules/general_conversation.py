@@ -1,10 +1,14 @@
-import dspy
+from llm_scheduler import INTERACTIVE
+from lm_provider import chain_of_thought
+from response_cache import ResponseCache
 from .base_module import BaseChatbotModule
 
 class GeneralConversationModule(BaseChatbotModule):
     def __init__(self, lm):
         super().__init__(lm)
-        self.generate_response = dspy.ChainOfThought("history: str, user_input: str, job_details: str -> response: str")
+        self.generate_response = chain_of_thought("history: str, user_input: str, job_details: str -> response: str",
+                                                 cache=ResponseCache(),
+                                                 name='general_response', lane=INTERACTIVE)
 
     def process(self, history, user_input, job_details):
         response = self.generate_response(history=history, user_input=user_input, job_details=job_details)
@@ -1,10 +1,12 @@
-import dspy
+from llm_scheduler import INTERACTIVE
+from lm_provider import chain_of_thought
 from .base_module import BaseChatbotModule
 
 class PersonalityAssessmentModule(BaseChatbotModule):
     def __init__(self, lm):
         super().__init__(lm)
-        self.assess_personality = dspy.ChainOfThought("history: str, user_input: str -> assessment: str")
+        self.assess_personality = chain_of_thought("history: str, user_input: str -> assessment: str",
+                                                   name='chat_personality_assessment', lane=INTERACTIVE)
 
     def process(self, history, user_input, job_details):
         if "personality assessment" in user_input.lower():
@@ -0,0 +1,110 @@
+import ast
+import hashlib
+import re
+
+from skill_cache import SkillCache
+
+LANGUAGE_ALIASES = {
+    'py': 'python', 'python3': 'python', 'js': 'javascript', 'ts': 'typescript', 'c++': 'cpp',
+    'cs': 'csharp', 'c#': 'csharp', 'golang': 'go', 'rb': 'ruby', 'sh': 'bash', 'shell': 'bash', 'kt': 'kotlin',
+}
+C_STYLE_LANGUAGES = {
+    'c', 'cpp', 'csharp', 'go', 'java', 'javascript', 'kotlin', 'php', 'rust', 'scala', 'swift', 'typescript',
+}
+HASH_COMMENT_LANGUAGES = {'bash', 'perl', 'r', 'ruby'}
+
+C_STRING = r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`[^`]*`)'''
+STRING_OR_C_COMMENT = re.compile(C_STRING + r'|//[^\n]*|/\*[\s\S]*?\*/')
+STRING_OR_HASH_COMMENT = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|#[^\n]*''')
+SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+
+def canonical_language(language):
+    language = (language or '').strip().lower()
+    return LANGUAGE_ALIASES.get(language, language)
+
+
+def precheck(code, language, max_chars):
+    """Return why code can be rejected without an LLM call, or None if it needs a real assessment."""
+    if len(code) > max_chars:
+        return f"Submission is too long to assess automatically ({len(code)} characters, limit {max_chars})."
+    if not code.strip():
+        return "Submission is empty."
+    if canonical_language(language) == 'python':
+        try:
+            ast.parse(code)
+        except (SyntaxError, ValueError) as e:
+            return f"Code does not compile: {e.msg if isinstance(e, SyntaxError) else e} (line {getattr(e, 'lineno', '?')})."
+    return None
+
+
+def _scope_nodes(scope):
+    """Nodes belonging to scope itself, without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(scope))
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, SCOPES + (ast.ClassDef,)):
+            stack.extend(ast.iter_child_nodes(node))
+
+
+def _canonical_python(code):
+    """Dump of the code's AST with function arguments and locals renamed by position.
+
+    Module-level and class-level names, attributes and anything declared
+    global or nonlocal keep their names, since other code can refer to them.
+    """
+    tree = ast.parse(code)
+    counter = 0
+    for scope in [node for node in ast.walk(tree) if isinstance(node, SCOPES)]:
+        nodes = list(_scope_nodes(scope))
+        shared = {name for node in nodes if isinstance(node, (ast.Global, ast.Nonlocal)) for name in node.names}
+        args = scope.args
+        local_names = [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs]
+        local_names += [arg.arg for arg in (args.vararg, args.kwarg) if arg is not None]
+        local_names += [node.id for node in nodes if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)]
+
+        mapping = {}
+        for name in local_names:
+            if name not in mapping and name not in shared:
+                mapping[name] = f'_v{counter}'
+                counter += 1
+        for node in ast.walk(scope):
+            if isinstance(node, ast.Name) and node.id in mapping:
+                node.id = mapping[node.id]
+            elif isinstance(node, ast.arg) and node.arg in mapping:
+                node.arg = mapping[node.arg]
+    return ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+
+def normalize_code(code, language):
+    """Reduce code to a form that ignores comments, whitespace and (for Python) local naming."""
+    language = canonical_language(language)
+    if language == 'python':
+        try:
+            return _canonical_python(code)
+        except (SyntaxError, ValueError):
+            pass
+    if language in C_STYLE_LANGUAGES:
+        code = STRING_OR_C_COMMENT.sub(lambda m: m.group(1) or ' ', code)
+        # Whitespace is insignificant outside string literals, and around brackets and separators.
+        parts = re.split(C_STRING, code)
+        for i in range(0, len(parts), 2):
+            parts[i] = re.sub(r' ?([{}()\[\];,]) ?', r'\1', re.sub(r'\s+', ' ', parts[i]))
+        return ''.join(parts).strip()
+    if language in HASH_COMMENT_LANGUAGES:
+        code = STRING_OR_HASH_COMMENT.sub(lambda m: m.group(1) or '', code)
+    lines = (line.rstrip() for line in code.splitlines())
+    return '\n'.join(line for line in lines if line.strip())
+
+
+def code_fingerprint(code, language):
+    normalized = normalize_code(code, language)
+    return hashlib.sha256(f'{canonical_language(language)}\0{normalized}'.encode('utf-8')).hexdigest()
+
+
+class CodeAssessmentCache(SkillCache):
+    """Persistent cache of code assessments keyed by code fingerprint."""
+
+    table = 'code_assessment_cache'
+    column = 'assessment'
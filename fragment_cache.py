@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """In-process LRU of rendered template fragments.
+
+    Keys carry the version of whatever the fragment shows (e.g. a job id and
+    its version counter), so an edit simply stops old entries from being
+    looked up and they age out; nothing needs invalidating.
+    """
+
+    def __init__(self, max_items=5000):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'memory_items': len(self._items)}
@@ -0,0 +1,231 @@
+"""In-process metrics for LLM calls, database queries and requests.
+
+Everything is kept in memory and rendered in the Prometheus text format by
+render_metrics(), so no external service is needed. While a RequestProfile
+is active (see start_profile), the same events are also recorded against it
+so a single request can report where its time went.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS = {
+    'llm_calls_total': ('counter', 'Predictor calls, including those answered from a response cache.'),
+    'llm_cache_hits_total': ('counter', 'Predictor calls answered from a response cache.'),
+    'llm_errors_total': ('counter', 'Predictor calls that raised.'),
+    'llm_call_seconds': ('histogram', 'Wall time of predictor calls that reached the LM.'),
+    'llm_prompt_tokens_total': ('counter', 'Prompt tokens reported by the LM.'),
+    'llm_completion_tokens_total': ('counter', 'Completion tokens reported by the LM.'),
+    'db_queries_total': ('counter', 'SQL statements executed.'),
+    'db_query_seconds': ('histogram', 'Execution time of SQL statements.'),
+    'http_requests_total': ('counter', 'HTTP requests handled.'),
+    'http_request_seconds': ('histogram', 'Time to produce an HTTP response, excluding streamed bodies.'),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_collectors = []
+
+_profile = contextvars.ContextVar('request_profile', default=None)
+_call = contextvars.ContextVar('llm_call', default=None)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        _counters[name, _labels(labels)] += value
+
+
+def observe(name, value, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'count': 0, 'sum': 0.0}
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+
+
+def register_collector(collector):
+    """Add a callable returning (metric name, labels dict, value) gauges, read at scrape time."""
+    _collectors.append(collector)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.llm_calls = []
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def llm_seconds(self):
+        return sum(call['seconds'] for call in self.llm_calls)
+
+    def summary(self):
+        return {
+            'seconds': round(time.perf_counter() - self.started, 4),
+            'llm_seconds': round(self.llm_seconds, 4),
+            'llm_calls': self.llm_calls,
+            'db_queries': self.db_queries,
+            'db_seconds': round(self.db_seconds, 4),
+        }
+
+    def server_timing(self):
+        """Value for a Server-Timing header summarising this request."""
+        return ', '.join([
+            f'llm;dur={self.llm_seconds * 1000:.1f};desc="{len(self.llm_calls)} calls"',
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}',
+        ])
+
+
+def start_profile():
+    """Start recording a profile for the current request; returns a token for finish_profile."""
+    return _profile.set(RequestProfile())
+
+
+def current_profile():
+    return _profile.get()
+
+
+def finish_profile(token):
+    profile = _profile.get()
+    _profile.reset(token)
+    return profile
+
+
+@contextmanager
+def llm_call(name):
+    """Time a predictor call; the caller may set call['cached'] and the LM hook adds token counts."""
+    call = {'name': name, 'seconds': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached': False}
+    token = _call.set(call)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        inc('llm_errors_total', predictor=name)
+        raise
+    finally:
+        call['seconds'] = round(time.perf_counter() - start, 4)
+        _call.reset(token)
+        record_llm_call(call)
+
+
+def record_llm_call(call):
+    name = call['name']
+    inc('llm_calls_total', predictor=name)
+    if call['cached']:
+        inc('llm_cache_hits_total', predictor=name)
+    else:
+        observe('llm_call_seconds', call['seconds'], predictor=name)
+    profile = _profile.get()
+    if profile is not None:
+        profile.llm_calls.append(call)
+
+
+def record_usage(usage):
+    """Add the token usage from one LM response to the active predictor call and the totals."""
+    if not usage:
+        return
+    call = _call.get()
+    name = call['name'] if call is not None else 'unattributed'
+    prompt_tokens = usage.get('prompt_tokens') or 0
+    completion_tokens = usage.get('completion_tokens') or 0
+    if call is not None:
+        call['prompt_tokens'] += prompt_tokens
+        call['completion_tokens'] += completion_tokens
+    inc('llm_prompt_tokens_total', prompt_tokens, predictor=name)
+    inc('llm_completion_tokens_total', completion_tokens, predictor=name)
+
+
+def instrument_lm(lm):
+    """Wrap lm.basic_request so every completion's token usage is recorded."""
+    basic_request = lm.basic_request
+
+    def instrumented(prompt, **kwargs):
+        response = basic_request(prompt, **kwargs)
+        record_usage(response.get('usage') if isinstance(response, dict) else None)
+        return response
+
+    lm.basic_request = instrumented
+    return lm
+
+
+def record_query(seconds):
+    inc('db_queries_total')
+    observe('db_query_seconds', seconds)
+    profile = _profile.get()
+    if profile is not None:
+        profile.db_queries += 1
+        profile.db_seconds += seconds
+
+
+def instrument_sqlalchemy(engine_class):
+    """Time every statement executed by engines of engine_class (normally sqlalchemy.engine.Engine)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine_class, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine_class, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_query(time.perf_counter() - conn.info['query_start'].pop())
+
+    @event.listens_for(engine_class, 'handle_error')
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                      for key, h in _histograms.items()}
+    gauges = {}
+    for collector in _collectors:
+        for name, labels, value in collector():
+            gauges[name, _labels(labels)] = value
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            lines += [f'{name}{_format_labels(labels)} {value:g}'
+                      for (metric, labels), value in sorted(counters.items()) if metric == name]
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(BUCKETS, histogram['buckets']):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", f"{bound:g}"),))} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]:g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+
+    for name in sorted({metric for metric, _ in gauges}):
+        lines.append(f'# TYPE {name} gauge')
+        lines += [f'{name}{_format_labels(labels)} {value:g}'
+                  for (metric, labels), value in sorted(gauges.items()) if metric == name]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,226 @@
+import threading
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import scipy.sparse as sp
+
+
+def pairwise_similarity(text1, text2):
+    """Cosine similarity of two texts under a vectorizer fitted on just the pair."""
+    try:
+        tfidf_matrix = TfidfVectorizer(stop_words='english').fit_transform([text1, text2])
+        return float(cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0])
+    except ValueError:
+        return 0.0
+
+
+class JobIndex:
+    """TF-IDF index over job skill texts.
+
+    The vectorizer is fitted once over the whole job corpus and job vectors are
+    kept as rows of a sparse matrix, so every job is scored against an
+    applicant with a single sparse product. Rows are updated in place with the
+    fitted vocabulary; the vectorizer is refitted once the number of updates
+    since the last fit exceeds refit_ratio of the corpus.
+
+    With a JobVectorStore, fit() publishes the index to the store, load()
+    maps the published version instead of fitting, and readers switch to a
+    newer version at most every check_interval seconds. Updates are then
+    applied to this process's copy with the published vocabulary and never
+    refit locally; the next published fit supersedes them.
+    """
+
+    def __init__(self, refit_ratio=0.2, store=None, check_interval=5.0):
+        self.refit_ratio = refit_ratio
+        self.store = store
+        self.check_interval = check_interval
+        self.is_built = False
+        self.version = None
+        self.vectorizer = None
+        self.matrix = None
+        self.job_ids = []
+        self._positions = {}
+        self._texts = {}
+        self._pending = 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def __contains__(self, job_id):
+        return job_id in self._positions
+
+    def fit(self, texts):
+        """Rebuild the index from a {job_id: skill_text} mapping, publishing it if there is a store."""
+        with self._lock:
+            self._texts = dict(texts)
+            self._refit()
+            if self.store is not None:
+                self._open(self.store.publish(self.vectorizer, self.matrix, self.job_ids))
+            self.is_built = True
+
+    def load(self):
+        """Map the store's current version; returns False if there is no store or nothing published."""
+        if self.store is None:
+            return False
+        with self._lock:
+            return self._open()
+
+    def _open(self, version=None):
+        opened = self.store.open(version)
+        if opened is None:
+            return False
+        self.vectorizer, self.matrix, self.job_ids, self.version = opened
+        self._positions = {job_id: i for i, job_id in enumerate(self.job_ids)}
+        self._texts = {}
+        self._pending = 0
+        self._checked = time.monotonic()
+        self.is_built = True
+        return True
+
+    def _refresh(self):
+        """Switch to a newer published version if one is due to be checked for. Hold _lock."""
+        if self.store is None or not self.is_built or time.monotonic() - self._checked < self.check_interval:
+            return
+        self._checked = time.monotonic()
+        version = self.store.current()
+        if version is not None and version != self.version:
+            self._open(version)
+
+    def _needs_refit(self, replaced=False):
+        if self.vectorizer is None:
+            return True
+        return self.store is None and (replaced or self._pending > self.refit_ratio * len(self._texts))
+
+    def _refit(self):
+        job_ids = list(self._texts)
+        vectorizer, matrix = None, None
+        if job_ids:
+            vectorizer = TfidfVectorizer(stop_words='english')
+            try:
+                matrix = vectorizer.fit_transform([self._texts[job_id] for job_id in job_ids]).tocsr()
+            except ValueError:
+                vectorizer, matrix = None, None
+        if matrix is None:
+            job_ids = []
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.job_ids = job_ids
+        self._positions = {job_id: i for i, job_id in enumerate(job_ids)}
+        self._pending = 0
+
+    def upsert(self, job_id, text):
+        with self._lock:
+            self._texts[job_id] = text
+            self._pending += 1
+            if self._needs_refit():
+                self._refit()
+                return
+
+            row = self.vectorizer.transform([text]).tocsr()
+            position = self._positions.get(job_id)
+            if position is None:
+                self.matrix = sp.vstack([self.matrix, row], format='csr')
+                self.job_ids = self.job_ids + [job_id]
+                self._positions = {**self._positions, job_id: len(self.job_ids) - 1}
+            else:
+                self.matrix = sp.vstack(
+                    [self.matrix[:position], row, self.matrix[position + 1:]], format='csr')
+
+    def upsert_many(self, texts):
+        """Add or replace several jobs from a {job_id: skill_text} mapping with one matrix update."""
+        with self._lock:
+            replaced = any(job_id in self._positions for job_id in texts)
+            self._texts.update(texts)
+            self._pending += len(texts)
+            if self._needs_refit(replaced):
+                self._refit()
+                return
+
+            job_ids = list(texts)
+            rows = self.vectorizer.transform([texts[job_id] for job_id in job_ids]).tocsr()
+            keep = [i for i, job_id in enumerate(self.job_ids) if job_id not in texts]
+            matrix = self.matrix[keep] if replaced else self.matrix
+            self.matrix = sp.vstack([matrix, rows], format='csr')
+            self.job_ids = [self.job_ids[i] for i in keep] + job_ids
+            self._positions = {job_id: i for i, job_id in enumerate(self.job_ids)}
+
+    def remove(self, job_id):
+        with self._lock:
+            self._texts.pop(job_id, None)
+            position = self._positions.get(job_id)
+            if position is None:
+                return
+            keep = [i for i in range(len(self.job_ids)) if i != position]
+            self.matrix = self.matrix[keep]
+            self.job_ids = [self.job_ids[i] for i in keep]
+            self._positions = {jid: i for i, jid in enumerate(self.job_ids)}
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            return self.vectorizer, self.matrix, self.job_ids
+
+    def vectorize(self, text):
+        vectorizer, _, _ = self.snapshot()
+        if vectorizer is None:
+            return None
+        return vectorizer.transform([text])
+
+    def text_similarity(self, text1, text2):
+        """Cosine similarity of two texts under the fitted vocabulary and IDF weights."""
+        vectorizer, _, _ = self.snapshot()
+        if vectorizer is None:
+            return pairwise_similarity(text1, text2)
+        vectors = vectorizer.transform([text1, text2])
+        return float(cosine_similarity(vectors[0:1], vectors[1:2])[0][0])
+
+    def score(self, text):
+        """Return (job_ids, scores) with the cosine similarity of text to every indexed job."""
+        vectorizer, matrix, job_ids = self.snapshot()
+        if vectorizer is None or not text.strip():
+            return [], np.zeros(0)
+        query = vectorizer.transform([text])
+        # TF-IDF rows are L2-normalized, so the dot product is the cosine similarity.
+        scores = (matrix @ query.T).toarray().ravel()
+        return job_ids, scores
+
+    def top_k(self, text, k, job_ids=None, exclude=()):
+        """Return up to k (job_id, score) pairs, best first, optionally restricted to job_ids."""
+        indexed_ids, scores = self.score(text)
+        if not indexed_ids or k <= 0:
+            return []
+
+        candidates = np.fromiter(
+            ((job_ids is None or job_id in job_ids) and job_id not in exclude for job_id in indexed_ids),
+            bool, len(indexed_ids))
+        candidates = np.flatnonzero(candidates)
+        if k < len(candidates):
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(indexed_ids[i], float(scores[i])) for i in candidates]
+
+    def similarity(self, text, job_id):
+        with self._lock:
+            self._refresh()
+            vectorizer, matrix = self.vectorizer, self.matrix
+            position = self._positions.get(job_id)
+        if vectorizer is None or position is None or not text.strip():
+            return 0.0
+        row = matrix[position]
+        query = vectorizer.transform([text])
+        return float((row @ query.T).toarray()[0][0])
+
+    def job_scores(self, job_id, texts):
+        """Cosine similarity of one indexed job to each of texts, as an array in the same order."""
+        with self._lock:
+            self._refresh()
+            vectorizer, matrix = self.vectorizer, self.matrix
+            position = self._positions.get(job_id)
+        if vectorizer is None or position is None or not texts:
+            return np.zeros(len(texts))
+        queries = vectorizer.transform(texts)
+        return (queries @ matrix[position].T).toarray().ravel()
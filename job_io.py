@@ -0,0 +1,92 @@
+"""Streaming CSV/JSONL readers and writers for bulk job import and export.
+
+Everything here works one record at a time so files of any size are handled
+in constant memory.
+"""
+import csv
+import io
+import json
+import os
+
+FORMATS = ('csv', 'jsonl')
+JOB_FIELDS = ('external_id', 'title', 'description')
+MAX_TITLE_LENGTH = 100
+MAX_EXTERNAL_ID_LENGTH = 100
+
+
+def detect_format(filename, default='csv'):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return 'csv' if extension == 'csv' else default
+
+
+def read_records(text_stream, fmt):
+    """Yield (line_number, record dict) from a CSV (with a header row) or JSON Lines text stream.
+
+    Lines that cannot be parsed are yielded as (line_number, ValueError).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError("expected a JSON object")
+            continue
+        yield line_number, record
+
+
+def validate_job(record):
+    """Return a clean {'external_id', 'title', 'description'} dict, or raise ValueError."""
+    title = str(record.get('title') or '').strip()
+    description = str(record.get('description') or '').strip()
+    external_id = str(record.get('external_id') or '').strip() or None
+    if not title:
+        raise ValueError("title is required")
+    if len(title) > MAX_TITLE_LENGTH:
+        raise ValueError(f"title is longer than {MAX_TITLE_LENGTH} characters")
+    if not description:
+        raise ValueError("description is required")
+    if external_id is not None and len(external_id) > MAX_EXTERNAL_ID_LENGTH:
+        raise ValueError(f"external_id is longer than {MAX_EXTERNAL_ID_LENGTH} characters")
+    return {'external_id': external_id, 'title': title, 'description': description}
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_records(records, fields, fmt):
+    """Yield the records (dicts) serialized as CSV with a header row, or as JSON Lines."""
+    if fmt == 'jsonl':
+        for record in records:
+            yield json.dumps({field: record.get(field) for field in fields}, default=str) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -1,67 +1,211 @@
-import dspy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-
-class SkillExtractor(dspy.Signature):
-    """Extract relevant skills from job descriptions and applicant profiles."""
-    text = dspy.InputField()
-    skills = dspy.OutputField(desc="A list of relevant skills extracted from the input text")
-
-class JobApplicantMatcher(dspy.Signature):
-    """Determine the compatibility between a job and an applicant based on skills and other factors."""
-    job_description = dspy.InputField()
-    applicant_profile = dspy.InputField()
-    compatibility_score = dspy.OutputField(desc="A float between 0 and 1 indicating the compatibility")
-    reasoning = dspy.OutputField(desc="Explanation of the compatibility score")
-
-class SimilarJobFinder(dspy.Signature):
-    """Find similar jobs based on a given job and applicant profile."""
-    target_job = dspy.InputField()
-    applicant_profile = dspy.InputField()
-    job_listings = dspy.InputField()
-    similar_jobs = dspy.OutputField(desc="A list of similar jobs with explanations")
-
-import dspy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import asyncio
+import itertools
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lm_provider import predict
+
+
+logger = logging.getLogger(__name__)
+
+
+def skills_to_text(skills):
+    """Flatten an extracted skills value (list or free text) into one string."""
+    if isinstance(skills, (list, tuple)):
+        return " ".join(str(skill) for skill in skills)
+    return str(skills or "")
+
+
+def batch_skills(entry):
+    """Validate one BatchSkillExtractor result object."""
+    skills = entry['skills']
+    if not isinstance(skills, (list, str)) or not skills:
+        raise ValueError("skills must be a non-empty list or string")
+    return skills
+
+
+def batch_match(entry):
+    """Validate one BatchJobApplicantMatcher result object."""
+    score = float(entry['compatibility_score'])
+    if not 0 <= score <= 1:
+        raise ValueError(f"compatibility_score {score} is outside 0..1")
+    return {"compatibility_score": score, "reasoning": str(entry.get('reasoning') or '')}
+
 
 class JobMatcher:
-    def __init__(self):
-        self.lm = dspy.OpenAI(model="gpt-3.5-turbo")
-        dspy.settings.configure(lm=self.lm)
-        
-        self.skill_extractor = dspy.Predict(SkillExtractor)
-        self.job_applicant_matcher = dspy.Predict(JobApplicantMatcher)
-        self.similar_job_finder = dspy.Predict(SimilarJobFinder)
+    def __init__(self, skill_cache=None, shortlist_size=20, max_concurrency=4, match_timeout=30,
+                 listing_token_budget=3000, batch_size=10, batch_max_chars=12000, vector_store=None,
+                 index_check_interval=5.0):
+        # dspy and the vector stack are heavy imports, so they are only loaded once a matcher is built.
+        from batch_predictor import BatchPredictor
+        from job_index import JobIndex
+        from job_signatures import (BatchJobApplicantMatcher, BatchSkillExtractor, JobApplicantMatcher,
+                                    SimilarJobFinder, SkillExtractor)
+        from response_cache import ResponseCache
+
+        self.skill_extractor = predict(SkillExtractor)
+        # Job postings are public and often near-duplicates (the same role reposted or imported with small
+        # edits), so job skill extraction may reuse a near match. Applicant profiles only ever match exactly.
+        self.job_skill_cache = ResponseCache(semantic_fields=('text',))
+        self.match_cache = ResponseCache()
+        self.job_applicant_matcher = predict(JobApplicantMatcher, cache=self.match_cache)
+        self.similar_job_finder = predict(SimilarJobFinder, cache=ResponseCache())
+        self.batch_skill_extractor = BatchPredictor(
+            predict(BatchSkillExtractor, max_tokens=80 * batch_size), 'items', 'results', batch_skills,
+            lambda item: self.skill_extractor(text=item['text']).skills,
+            max_items=batch_size, max_chars=batch_max_chars)
+        self.batch_matcher = BatchPredictor(
+            predict(BatchJobApplicantMatcher, max_tokens=120 * batch_size), 'jobs', 'results', batch_match,
+            self._match_one, max_items=batch_size, max_chars=batch_max_chars, afallback=self._amatch_one)
         
-        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self.skill_cache = skill_cache
+        self.job_index = JobIndex(store=vector_store, check_interval=index_check_interval)
+        self.shortlist_size = shortlist_size
+        self.match_timeout = match_timeout
+        self.listing_token_budget = listing_token_budget
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='job-matcher')
+
+    def extract_skills(self, text, semantic=False):
+        """Skills in text; with semantic, a near-duplicate job description's skills may be reused."""
+        if self.skill_cache is not None:
+            skills = self.skill_cache.get(text)
+            if skills is not None:
+                return skills
+        if semantic:
+            skills = self.job_skill_cache.get({'text': text})
+            if skills is not None:
+                return skills
 
-    def extract_skills(self, text):
         result = self.skill_extractor(text=text)
+        if self.skill_cache is not None:
+            self.skill_cache.set(text, result.skills)
+        if semantic:
+            self.job_skill_cache.set({'text': text}, result.skills)
         return result.skills
 
+    def invalidate_skills(self, text):
+        """Drop any cached extraction for text, e.g. after a job description is edited."""
+        if self.skill_cache is not None:
+            self.skill_cache.invalidate(text)
+        # Otherwise the edited description would likely be served the old one's skills as a near match.
+        self.job_skill_cache.invalidate({'text': text})
+
+    def cache_stats(self):
+        return self.skill_cache.stats() if self.skill_cache is not None else {}
+
+    def extract_skills_many(self, texts, max_workers=1, semantic=False):
+        """Skills for several texts as {text: skills}, extracting cache misses in batched calls.
+
+        Batches run on up to max_workers threads. Texts whose extraction
+        fails are logged and left out. semantic is as for extract_skills.
+        """
+        skills, missing = {}, []
+        for text in dict.fromkeys(texts):
+            cached = self.skill_cache.get(text) if self.skill_cache is not None else None
+            if cached is None and semantic:
+                cached = self.job_skill_cache.get({'text': text})
+            if cached is not None:
+                skills[text] = cached
+            else:
+                missing.append(text)
+
+        chunks = list(self.batch_skill_extractor.chunks({i: {"text": text} for i, text in enumerate(missing)}))
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='skill-extraction') as executor:
+                batches = list(executor.map(self.batch_skill_extractor.run_chunk, chunks))
+        else:
+            batches = [self.batch_skill_extractor.run_chunk(chunk) for chunk in chunks]
+        for results in batches:
+            for i, value in results.items():
+                skills[missing[i]] = value
+                if self.skill_cache is not None:
+                    self.skill_cache.set(missing[i], value)
+                if semantic:
+                    self.job_skill_cache.set({'text': missing[i]}, value)
+        return skills
+
+    def skills_text(self, text, semantic=False):
+        return skills_to_text(self.extract_skills(text, semantic))
+
+    def job_skill_texts(self, jobs, max_workers=1):
+        """{job_id: skill text} for jobs, leaving out any whose extraction failed."""
+        skills = self.extract_skills_many([job.description for job in jobs], max_workers, semantic=True)
+        missing = [job.id for job in jobs if job.description not in skills]
+        if missing:
+            logger.warning("Skill extraction failed for jobs %s", missing)
+        return {job.id: skills_to_text(skills[job.description]) for job in jobs if job.description in skills}
+
+    def build_job_index(self, jobs, chunk_size=1000, max_workers=4):
+        """Fit the job index over the skills of every job in the catalog."""
+        jobs, texts = iter(jobs), {}
+        for chunk in iter(lambda: list(itertools.islice(jobs, chunk_size)), []):
+            texts.update(self.job_skill_texts(chunk, max_workers))
+        self.job_index.fit(texts)
+
+    def load_job_index(self):
+        """Map the job index published to the vector store, if any; returns whether it was loaded."""
+        return self.job_index.load()
+
+    def index_job(self, job):
+        if self.job_index.is_built:
+            self.job_index.upsert(job.id, self.skills_text(job.description, semantic=True))
+
+    def index_jobs(self, jobs, max_workers=8):
+        """Extract skills for many jobs in parallel batches and add them to the index if it is built.
+
+        Extraction results land in the skill cache either way, so a later
+        build_job_index over the same jobs needs no LLM calls. Failures are
+        logged and skipped; returns how many jobs succeeded.
+        """
+        texts = self.job_skill_texts(list(jobs), max_workers)
+        if self.job_index.is_built:
+            self.job_index.upsert_many(texts)
+        return len(texts)
+
+    def remove_job(self, job_id):
+        self.job_index.remove(job_id)
+
+    def _match_one(self, item, applicant_profile):
+        result = self.job_applicant_matcher(job_description=item["description"], applicant_profile=applicant_profile)
+        return {"compatibility_score": float(result.compatibility_score), "reasoning": result.reasoning}
+
+    async def _amatch_one(self, item, applicant_profile):
+        result = await self.job_applicant_matcher.acall(job_description=item["description"],
+                                                        applicant_profile=applicant_profile)
+        return {"compatibility_score": float(result.compatibility_score), "reasoning": result.reasoning}
+
     def calculate_similarity(self, text1, text2):
         if not text1.strip() or not text2.strip():
             return 0.0
-        try:
-            tfidf_matrix = self.vectorizer.fit_transform([text1, text2])
-            return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        except ValueError:
-            return 0.0
+        return self.job_index.text_similarity(text1, text2)
+
+    def skill_similarity(self, job, applicant):
+        applicant_skills = self.skills_text(applicant.profile)
+        if job.id in self.job_index:
+            return self.job_index.similarity(applicant_skills, job.id)
+        return self.calculate_similarity(self.skills_text(job.description, semantic=True), applicant_skills)
 
     def match_job_applicant(self, job, applicant):
-        job_skills = self.extract_skills(job.description)
-        applicant_skills = self.extract_skills(applicant.profile)
-        
-        skill_similarity = self.calculate_similarity(" ".join(job_skills), " ".join(applicant_skills))
-        
+        skill_similarity = self.skill_similarity(job, applicant)
         result = self.job_applicant_matcher(
             job_description=job.description,
             applicant_profile=applicant.profile
         )
-        
+        return self._match_result(result, skill_similarity)
+
+    async def amatch_job_applicant(self, job, applicant):
+        """Coroutine version of match_job_applicant; skill lookups run on a thread."""
+        skill_similarity = await asyncio.to_thread(self.skill_similarity, job, applicant)
+        result = await self.job_applicant_matcher.acall(
+            job_description=job.description,
+            applicant_profile=applicant.profile
+        )
+        return self._match_result(result, skill_similarity)
+
+    @staticmethod
+    def _match_result(result, skill_similarity):
         combined_score = (float(result.compatibility_score) + skill_similarity) / 2
         
         return {
@@ -71,47 +215,186 @@ class JobMatcher:
         }
 
 
+    def candidate_job_ids(self, target_job, applicant, k):
+        """Ids of the k indexed jobs nearest to the applicant and target job, best first."""
+        query = f"{self.skills_text(applicant.profile)} {self.skills_text(target_job.description, semantic=True)}"
+        return [job_id for job_id, _ in self.job_index.top_k(query, k, exclude={target_job.id})]
+
+    def build_job_listings(self, jobs, token_budget=None):
+        """Format jobs for the SimilarJobFinder prompt, stopping once token_budget is spent.
+
+        Tokens are estimated at four characters each; descriptions are trimmed
+        so that a single long posting cannot use up the whole budget.
+        """
+        budget_chars = (token_budget or self.listing_token_budget) * 4
+        max_description = max(budget_chars // 4, 200)
+        listings, used = [], 0
+        for job in jobs:
+            description = job.description
+            if len(description) > max_description:
+                description = description[:max_description].rsplit(' ', 1)[0] + '...'
+            listing = f"Job ID: {job.id}, Title: {job.title}, Description: {description}"
+            if used + len(listing) > budget_chars:
+                break
+            listings.append(listing)
+            used += len(listing) + 1
+        return "\n".join(listings)
+
     def find_similar_jobs(self, target_job, applicant, all_jobs):
-        """Find similar jobs based on the target job and applicant profile."""
-        job_listings = [f"Job ID: {job.id}, Title: {job.title}, Description: {job.description}" 
-                        for job in all_jobs if job.id != target_job.id]
+        """Find similar jobs based on the target job and applicant profile.
+
+        all_jobs should be a prefiltered candidate list (see candidate_job_ids),
+        best first, since listings past the token budget are dropped.
+        """
+        job_listings = self.build_job_listings(job for job in all_jobs if job.id != target_job.id)
         
         result = self.similar_job_finder(
             target_job=f"Title: {target_job.title}, Description: {target_job.description}",
             applicant_profile=applicant.profile,
-            job_listings="\n".join(job_listings)
+            job_listings=job_listings
         )
         
-        similar_jobs = []
-        for similar_job in result.similar_jobs:
+        job_ids = [int(job_id) for job_id in re.findall(r'Job ID:\s*(\d+)', str(result.similar_jobs))]
+        jobs_by_id = {job.id: job for job in all_jobs}
+        candidates = [jobs_by_id[job_id] for job_id in dict.fromkeys(job_ids) if job_id in jobs_by_id]
+
+        return sorted(self.score_jobs(candidates, applicant), key=lambda x: x["score"], reverse=True)
+
+    def score_jobs(self, jobs, applicant, timeout=None):
+        """Score the applicant against each job, several jobs per LLM call.
+
+        Same scores as match_job_applicant. Batches run concurrently on the
+        matcher's thread pool; jobs whose scoring fails or has not finished
+        within timeout seconds (match_timeout by default) are left out, so
+        callers get partial results instead of waiting on the slowest batch.
+        """
+        timeout = self.match_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        similarities, matches, pending = self._plan_scoring(jobs, applicant)
+
+        futures = [
+            (chunk, self.executor.submit(self.batch_matcher.run_chunk, chunk, applicant_profile=applicant.profile))
+            for chunk in self.batch_matcher.chunks(pending)
+        ]
+        for chunk, future in futures:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
             try:
-                job_id = int(similar_job.split("Job ID: ")[1].split(",")[0])
-                job = next((j for j in all_jobs if j.id == job_id), None)
-                if job:
-                    match_result = self.match_job_applicant(job, applicant)
-                    similar_jobs.append({
-                        "job": job,
-                        "score": match_result["score"],
-                        "reasoning": match_result["reasoning"]
-                    })
-            except IndexError:
-                continue  # Skip this iteration if the expected format is not met
-        
-        return sorted(similar_jobs, key=lambda x: x["score"], reverse=True)
-
-    def get_job_recommendations(self, applicant, all_jobs, top_n=5):
-        """Get job recommendations for an applicant."""
-        recommendations = []
-        for job in all_jobs:
-            match_result = self.match_job_applicant(job, applicant)
-            recommendations.append({
+                matches.update(future.result(timeout=remaining))
+            except Exception:
+                future.cancel()
+                logger.warning("Skipping match for jobs %s", [job_id for job_id, _ in chunk], exc_info=True)
+        return self._collect_scores(jobs, applicant, similarities, matches, pending)
+
+    async def ascore_jobs(self, jobs, applicant, timeout=None):
+        """Coroutine version of score_jobs: batches are awaited together instead of run on the thread pool.
+
+        Skill lookups, normally answered from the skill cache and job index,
+        run on a thread.
+        """
+        timeout = self.match_timeout if timeout is None else timeout
+        similarities, matches, pending = await asyncio.to_thread(self._plan_scoring, jobs, applicant)
+
+        chunks = list(self.batch_matcher.chunks(pending))
+        tasks = [asyncio.ensure_future(self.batch_matcher.arun_chunk(chunk, applicant_profile=applicant.profile))
+                 for chunk in chunks]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout or None)
+        for chunk, task in zip(chunks, tasks):
+            if not task.done():
+                task.cancel()
+                logger.warning("Skipping match for jobs %s: timed out", [job_id for job_id, _ in chunk])
+            elif task.exception() is not None:
+                logger.warning("Skipping match for jobs %s", [job_id for job_id, _ in chunk], exc_info=task.exception())
+            else:
+                matches.update(task.result())
+        return self._collect_scores(jobs, applicant, similarities, matches, pending)
+
+    def _plan_scoring(self, jobs, applicant):
+        """Skill similarities, cached LLM matches and jobs still to be matched, each keyed by job id."""
+        applicant_skills = self.skills_text(applicant.profile)
+        unindexed = self.job_skill_texts([job for job in jobs if job.id not in self.job_index])
+
+        similarities, matches, pending = {}, {}, {}
+        for job in jobs:
+            if job.id in self.job_index:
+                similarities[job.id] = self.job_index.similarity(applicant_skills, job.id)
+            elif job.id in unindexed:
+                similarities[job.id] = self.calculate_similarity(unindexed[job.id], applicant_skills)
+            else:
+                continue
+            cached = self.match_cache.get({"job_description": job.description, "applicant_profile": applicant.profile})
+            if cached is not None:
+                matches[job.id] = {"compatibility_score": float(cached.compatibility_score), "reasoning": cached.reasoning}
+            else:
+                pending[job.id] = {"description": job.description}
+        return similarities, matches, pending
+
+    def _collect_scores(self, jobs, applicant, similarities, matches, pending):
+        from dspy import Prediction
+
+        scored = []
+        for job in jobs:
+            match_result = matches.get(job.id)
+            if match_result is None:
+                continue
+            if job.id in pending:
+                self.match_cache.set({"job_description": job.description, "applicant_profile": applicant.profile},
+                                     Prediction(**match_result))
+            scored.append({
                 "job": job,
-                "score": match_result["score"],
+                "score": (match_result["compatibility_score"] + similarities[job.id]) / 2,
                 "reasoning": match_result["reasoning"]
             })
+        return scored
+
+    def rank_jobs(self, applicant, jobs, k):
+        """Cheap first stage: score the applicant against every job in one sparse product.
+
+        Returns up to k (job_id, skill_similarity) pairs, best first.
+        """
+        index = self.job_index
+        if not index.is_built and not self.load_job_index():
+            if index.store is None:
+                self.build_job_index(jobs)
+            else:
+                # Nothing published yet. A fit over just these jobs must not become every
+                # worker's index, so rank them with a private one instead.
+                from job_index import JobIndex
+                index = JobIndex()
+                index.fit(self.job_skill_texts(jobs))
+        missing = self.job_skill_texts([job for job in jobs if job.id not in index])
+        if missing:
+            index.upsert_many(missing)
+
+        return index.top_k(self.skills_text(applicant.profile), k, job_ids={job.id for job in jobs})
+
+    def get_job_recommendations(self, applicant, all_jobs, top_n=5, shortlist_size=None, ranked=None):
+        """Get job recommendations for an applicant.
+
+        Jobs are ranked by skill similarity first and only the best
+        shortlist_size candidates are re-scored by the LLM matcher. Pass ranked
+        (job_id, score) pairs, e.g. precomputed match scores, to skip ranking.
+        """
+        shortlist_size = max(shortlist_size or self.shortlist_size, top_n)
+        shortlist = self._shortlist(applicant, all_jobs, shortlist_size, ranked)
+        recommendations = self.score_jobs(shortlist, applicant)
         
         return sorted(recommendations, key=lambda x: x["score"], reverse=True)[:top_n]
 
+    async def aget_job_recommendations(self, applicant, all_jobs, top_n=5, shortlist_size=None, ranked=None):
+        """Coroutine version of get_job_recommendations."""
+        shortlist_size = max(shortlist_size or self.shortlist_size, top_n)
+        shortlist = await asyncio.to_thread(self._shortlist, applicant, all_jobs, shortlist_size, ranked)
+        recommendations = await self.ascore_jobs(shortlist, applicant)
+
+        return sorted(recommendations, key=lambda x: x["score"], reverse=True)[:top_n]
+
+    def _shortlist(self, applicant, all_jobs, shortlist_size, ranked):
+        jobs_by_id = {job.id: job for job in all_jobs}
+        if ranked is None:
+            ranked = self.rank_jobs(applicant, all_jobs, shortlist_size)
+        return [jobs_by_id[job_id] for job_id, _ in ranked[:shortlist_size] if job_id in jobs_by_id]
+
 class Applicant:
     def __init__(self, id, profile):
         self.id = id
@@ -0,0 +1,36 @@
+import dspy
+
+class SkillExtractor(dspy.Signature):
+    """Extract relevant skills from job descriptions and applicant profiles."""
+    text = dspy.InputField()
+    skills = dspy.OutputField(desc="A list of relevant skills extracted from the input text")
+
+class JobApplicantMatcher(dspy.Signature):
+    """Determine the compatibility between a job and an applicant based on skills and other factors."""
+    job_description = dspy.InputField()
+    applicant_profile = dspy.InputField()
+    compatibility_score = dspy.OutputField(desc="A float between 0 and 1 indicating the compatibility")
+    reasoning = dspy.OutputField(desc="Explanation of the compatibility score")
+
+class SimilarJobFinder(dspy.Signature):
+    """Find similar jobs based on a given job and applicant profile."""
+    target_job = dspy.InputField()
+    applicant_profile = dspy.InputField()
+    job_listings = dspy.InputField()
+    similar_jobs = dspy.OutputField(desc="A list of similar jobs with explanations")
+
+class BatchSkillExtractor(dspy.Signature):
+    """Extract relevant skills from each of several job descriptions or applicant profiles.
+
+    Answer for every item, using its id."""
+    items = dspy.InputField(desc='A JSON list of {"id": ..., "text": ...} objects')
+    results = dspy.OutputField(desc='A JSON list with one {"id": ..., "skills": [...]} object per item')
+
+class BatchJobApplicantMatcher(dspy.Signature):
+    """Determine the compatibility between an applicant and each of several jobs based on skills and other factors.
+
+    Answer for every job, using its id."""
+    applicant_profile = dspy.InputField()
+    jobs = dspy.InputField(desc='A JSON list of {"id": ..., "description": ...} objects')
+    results = dspy.OutputField(desc='A JSON list with one {"id": ..., "compatibility_score": <float between 0 and 1>, '
+                                    '"reasoning": ...} object per job')
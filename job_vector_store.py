@@ -0,0 +1,119 @@
+"""Versioned on-disk store for the job index, shared by every worker process.
+
+Each published version is a directory holding the TF-IDF job matrix as its
+CSR arrays (data.npy, indices.npy, indptr.npy), the job id of every row
+(job_ids.npy), and the vocabulary and IDF weights needed to vectorize
+queries. Readers open the arrays with np.load(mmap_mode='r'), so all workers
+share one copy through the page cache and opening a version costs no parsing
+or refitting.
+
+publish() writes a new version beside the old ones and then atomically
+repoints the `current` symlink, so a reader always sees a complete version.
+Superseded versions are pruned; processes still mapping one keep their view
+until they reopen.
+"""
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+ARRAYS = ('data', 'indices', 'indptr', 'job_ids')
+
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JobVectorStore:
+    def __init__(self, path, keep=2):
+        self.path = path
+        self.keep = keep
+        os.makedirs(path, exist_ok=True)
+
+    def current(self):
+        """Name of the published version, or None if nothing has been published."""
+        try:
+            return os.readlink(os.path.join(self.path, 'current'))
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock across processes, e.g. to serialize rebuilds."""
+        with open(os.path.join(self.path, '.lock'), 'w') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def publish(self, vectorizer, matrix, job_ids):
+        """Write a new version from a fitted vectorizer and its CSR matrix and make it current."""
+        version = f'v{time.time_ns()}-{os.getpid()}'
+        staging = os.path.join(self.path, f'.{version}')
+        os.makedirs(staging)
+        meta = {'jobs': len(job_ids), 'created_at': time.time()}
+        if vectorizer is not None:
+            arrays = {'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+                      'job_ids': np.asarray(job_ids, dtype=np.int64)}
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f'{name}.npy'), array)
+            np.save(os.path.join(staging, 'idf.npy'), vectorizer.idf_)
+            with open(os.path.join(staging, 'vocabulary.json'), 'w') as f:
+                json.dump({term: int(column) for term, column in vectorizer.vocabulary_.items()}, f)
+            meta['shape'] = list(matrix.shape)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        for name in os.listdir(staging):
+            _fsync(os.path.join(staging, name))
+
+        os.rename(staging, os.path.join(self.path, version))
+        link = os.path.join(self.path, f'.current-{version}')
+        os.symlink(version, link)
+        os.replace(link, os.path.join(self.path, 'current'))
+        _fsync(self.path)
+        self.prune()
+        return version
+
+    def open(self, version=None):
+        """Map a version (default: the current one) as (vectorizer, matrix, job_ids, version).
+
+        The matrix and job id arrays are read-only views of the files. An empty
+        version maps to (None, None, [], version); returns None if nothing has
+        been published.
+        """
+        version = version or self.current()
+        if version is None:
+            return None
+        directory = os.path.join(self.path, version)
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if 'shape' not in meta:
+            return None, None, [], version
+
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+        matrix = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                               shape=tuple(meta['shape']), copy=False)
+        with open(os.path.join(directory, 'vocabulary.json')) as f:
+            vectorizer = TfidfVectorizer(stop_words='english', vocabulary=json.load(f))
+        vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+        return vectorizer, matrix, arrays['job_ids'].tolist(), version
+
+    def prune(self):
+        """Delete all but the newest keep versions, never the current one."""
+        current = self.current()
+        versions = sorted((name for name in os.listdir(self.path) if name.startswith('v')),
+                          key=lambda name: int(name[1:].split('-')[0]), reverse=True)
+        for name in versions[self.keep:]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
@@ -0,0 +1,282 @@
+"""Admission control for LLM calls.
+
+Every predictor call (see lm_provider.Predictor) asks the scheduler for a
+slot before it reaches the provider. A call starts once:
+  * no call in a higher-priority lane is waiting,
+  * it is at the head of its own lane,
+  * fewer than max_concurrency calls are running (background calls leave
+    interactive_reserve of those slots free), and
+  * the request and token buckets have capacity.
+
+Lanes have bounded queues; a call that cannot queue, or waits longer than
+its timeout, raises SchedulerBusy so callers can shed load instead of piling
+up threads. Calls that fail with a rate limit or transient provider error are
+retried with jittered exponential backoff.
+
+run_async is the coroutine counterpart of run: it waits in the same queues
+without holding a thread, and only the admitted call itself runs on the
+scheduler's pool of max_concurrency threads.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {'RateLimitError', 'APIConnectionError', 'APITimeoutError', 'InternalServerError', 'Timeout',
+                    'ServiceUnavailableError'}
+
+
+class SchedulerBusy(Exception):
+    """The LLM scheduler is saturated and did not admit the call in time."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills at rate_per_minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount is available (0 if it is now); amounts above capacity wait for a full bucket."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+def is_retryable(error):
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return status in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error):
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency=8, requests_per_minute=0, tokens_per_minute=0, queue_size=100,
+                 interactive_reserve=1, max_retries=3, base_delay=0.5, max_delay=20.0, timeouts=None):
+        self.max_concurrency = max_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeouts = {INTERACTIVE: 30.0, BACKGROUND: None, **(timeouts or {})}
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+        self._waiting = {lane: deque() for lane in LANES}
+        self._async_waiters = {}
+        self._executor = None
+        self._running = 0
+        self.rejected = 0
+        self.retries = 0
+
+    def _notify(self):
+        """Wake every waiter, threads and coroutines alike, to recheck whether it may start. Hold _cond."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, lane):
+        queue = self._waiting[lane]
+        if len(queue) >= self.queue_size:
+            self.rejected += 1
+            raise SchedulerBusy(f"LLM {lane} queue is full", retry_after=self.base_delay * 4)
+        ticket = object()
+        queue.append(ticket)
+        return ticket
+
+    def _start(self, tokens):
+        self._running += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def _timed_out(self, lane, wait):
+        self.rejected += 1
+        return SchedulerBusy(f"Timed out waiting for an LLM {lane} slot", retry_after=wait or 1.0)
+
+    def _wait_time(self, lane, ticket, tokens):
+        """0 if ticket may start now, else how long to wait before checking again (None: until notified)."""
+        for other in LANES[:LANES.index(lane)]:
+            if self._waiting[other]:
+                return None
+        if self._waiting[lane][0] is not ticket:
+            return None
+        limit = self.max_concurrency - (self.interactive_reserve if lane != INTERACTIVE else 0)
+        if self._running >= limit:
+            return None
+        waits = [bucket.wait_time(amount) for bucket, amount in ((self.requests, 1), (self.tokens, tokens))
+                 if bucket is not None]
+        wait = max(waits, default=0.0)
+        return wait if wait > 0 else 0.0
+
+    def acquire(self, lane=BACKGROUND, tokens=0, timeout=None):
+        """Block until the call may start; raises SchedulerBusy if the lane is full or timeout passes."""
+        timeout = self.timeouts.get(lane) if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = self._enqueue(lane)
+            try:
+                while True:
+                    wait = self._wait_time(lane, ticket, tokens)
+                    if wait == 0.0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._timed_out(lane, wait)
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+                self._start(tokens)
+            finally:
+                self._waiting[lane].remove(ticket)
+                self._notify()
+
+    async def acquire_async(self, lane=BACKGROUND, tokens=0, timeout=None):
+        """Coroutine counterpart of acquire, sharing its queues and ordering."""
+        timeout = self.timeouts.get(lane) if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        event = asyncio.Event()
+        with self._cond:
+            ticket = self._enqueue(lane)
+            self._async_waiters[ticket] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._wait_time(lane, ticket, tokens)
+                    if wait == 0.0:
+                        self._start(tokens)
+                        return
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._timed_out(lane, wait)
+                        wait = remaining if wait is None else min(wait, remaining)
+                    event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._waiting[lane].remove(ticket)
+                del self._async_waiters[ticket]
+                self._notify()
+
+    def release(self, estimated_tokens=0, actual_tokens=None):
+        """Free a slot, correcting the token bucket once the real usage is known."""
+        with self._cond:
+            self._running -= 1
+            if self.tokens is not None and actual_tokens is not None:
+                self.tokens.give(estimated_tokens - actual_tokens)
+            self._notify()
+
+    def run(self, fn, lane=BACKGROUND, tokens=0, usage=None, timeout=None):
+        """Call fn() in a slot, retrying transient failures.
+
+        tokens is the estimated cost of one attempt; usage(), if given, returns
+        the tokens actually used so far and is used to correct the estimate.
+        Transient failures that outlast max_retries raise SchedulerBusy.
+        """
+        settled = 0
+        for attempt in range(self.max_retries + 1):
+            self.acquire(lane, tokens, timeout)
+            try:
+                result = fn()
+            except Exception as e:
+                settled = self._settle(tokens, usage, settled)
+                time.sleep(self._retry_delay(e, attempt))
+            else:
+                self._settle(tokens, usage, settled)
+                return result
+
+    async def run_async(self, fn, lane=BACKGROUND, tokens=0, usage=None, timeout=None):
+        """Coroutine counterpart of run: fn() runs on the scheduler's threads once admitted."""
+        settled = 0
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(lane, tokens, timeout)
+            # Copy the caller's context so instrumentation attributes the call correctly.
+            future = self._get_executor().submit(contextvars.copy_context().run, fn)
+            try:
+                result = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # The call cannot be interrupted; free its slot once it has finished.
+                future.add_done_callback(lambda _: self._settle(tokens, usage, settled))
+                raise
+            except Exception as e:
+                settled = self._settle(tokens, usage, settled)
+                await asyncio.sleep(self._retry_delay(e, attempt))
+            else:
+                self._settle(tokens, usage, settled)
+                return result
+
+    def _get_executor(self):
+        with self._cond:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm-call')
+            return self._executor
+
+    def _settle(self, tokens, usage, settled):
+        """Release an attempt's slot; returns the tokens used so far."""
+        used = usage() if usage else None
+        self.release(tokens, None if used is None else used - settled)
+        return used or 0
+
+    def _retry_delay(self, error, attempt):
+        """Re-raise error unless it should be retried; otherwise return how long to back off."""
+        if not is_retryable(error):
+            raise error
+        delay = retry_after(error) or random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if attempt >= self.max_retries:
+            raise SchedulerBusy("LLM provider is unavailable or rate limiting", retry_after=delay) from error
+        with self._cond:
+            self.retries += 1
+        logger.warning("LLM call failed (%s); retry %d in %.1fs", type(error).__name__, attempt + 1, delay)
+        return delay
+
+    def stats(self):
+        with self._cond:
+            return {
+                'running': self._running,
+                'rejected': self.rejected,
+                'retries': self.retries,
+                **{f'waiting_{lane}': len(queue) for lane, queue in self._waiting.items()},
+            }
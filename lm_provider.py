@@ -0,0 +1,296 @@
+"""Process-wide language model registry.
+
+The LM client, dspy and anything else expensive are only imported and built
+the first time a predictor actually needs them, so importing the app (for
+migrations, CLI commands or tests) stays cheap and works without credentials.
+
+The backend is chosen with LM_BACKEND: 'openai' (default) or 'local', the
+deterministic stand-in in local_lm.py used for offline benchmarking.
+"""
+import os
+import threading
+
+import instrumentation
+from llm_scheduler import BACKGROUND, INTERACTIVE
+
+_lm = None
+_lm_lock = threading.Lock()
+_scheduler = None
+
+
+def _openai_lm():
+    import dspy
+    return dspy.OpenAI(model=os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo'))
+
+
+def _local_lm():
+    from local_lm import LocalLM
+    return LocalLM(
+        latency=float(os.environ.get('LOCAL_LM_LATENCY', 0)),
+        token_latency=float(os.environ.get('LOCAL_LM_TOKEN_LATENCY', 0)),
+        completion_tokens=int(os.environ.get('LOCAL_LM_COMPLETION_TOKENS', 60)),
+    )
+
+
+BACKENDS = {
+    'openai': _openai_lm,
+    'local': _local_lm,
+}
+
+
+def register_backend(name, factory):
+    """Make an LM factory available under LM_BACKEND=name."""
+    BACKENDS[name] = factory
+
+
+def get_lm():
+    """Return the shared LM, creating it from the configured backend on first use."""
+    global _lm
+    if _lm is None:
+        with _lm_lock:
+            if _lm is None:
+                backend = os.environ.get('LM_BACKEND', 'openai')
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown LM_BACKEND {backend!r}; expected one of {sorted(BACKENDS)}")
+                import dspy
+                lm = BACKENDS[backend]()
+                instrumentation.instrument_lm(lm)
+                dspy.settings.configure(lm=lm)
+                _lm = lm
+    return _lm
+
+
+def get_scheduler():
+    """Return the shared LLMScheduler, configured from the LLM_* environment variables on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _lm_lock:
+            if _scheduler is None:
+                from llm_scheduler import LLMScheduler
+                _scheduler = LLMScheduler(
+                    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', 8)),
+                    requests_per_minute=float(os.environ.get('LLM_REQUESTS_PER_MINUTE', 0)),
+                    tokens_per_minute=float(os.environ.get('LLM_TOKENS_PER_MINUTE', 0)),
+                    queue_size=int(os.environ.get('LLM_QUEUE_SIZE', 100)),
+                    interactive_reserve=int(os.environ.get('LLM_INTERACTIVE_RESERVE', 1)),
+                    max_retries=int(os.environ.get('LLM_MAX_RETRIES', 3)),
+                    timeouts={INTERACTIVE: float(os.environ.get('LLM_INTERACTIVE_TIMEOUT', 30))},
+                )
+    return _scheduler
+
+
+def estimate_tokens(texts, lm, max_tokens=None):
+    """Rough token cost of a call: four characters per token plus prompt scaffolding and the completion."""
+    return sum(len(str(text)) for text in texts) // 4 + 100 + (max_tokens or lm.kwargs.get('max_tokens', 150))
+
+
+def stream_completion(lm, prompt, usage):
+    """Yield the LM's completion of prompt in chunks as it is produced; usage receives the token counts."""
+    if hasattr(lm, 'stream_completion'):
+        yield from lm.stream_completion(prompt, usage)
+        return
+
+    import openai
+    # The same request dspy's OpenAI client makes for a chat model, streamed.
+    messages = [{'role': 'user', 'content': prompt}]
+    if getattr(lm, 'system_prompt', None):
+        messages.insert(0, {'role': 'system', 'content': lm.system_prompt})
+    stream = openai.chat.completions.create(**{**lm.kwargs, 'n': 1}, messages=messages, stream=True,
+                                            stream_options={'include_usage': True})
+    for chunk in stream:
+        if chunk.usage is not None:
+            usage.update(prompt_tokens=chunk.usage.prompt_tokens, completion_tokens=chunk.usage.completion_tokens)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def field_text(chunks, prefix, next_prefix, at_start=False):
+    """Yield the text of one output field out of a streamed completion as it arrives.
+
+    The field starts after prefix (or at the start of the completion if
+    at_start) and ends at next_prefix. Text that could be the beginning of
+    next_prefix, or whitespace separating it, is held back until more arrives.
+    """
+    buffer, sent, started = '', 0 if at_start else None, False
+    for chunk in chunks:
+        buffer += chunk
+        if sent is None:
+            index = buffer.find(prefix)
+            if index < 0:
+                continue
+            sent = index + len(prefix)
+        end = buffer.find(next_prefix, sent) if next_prefix else -1
+        limit = end if end >= 0 else len(buffer) - len(next_prefix or '')
+        text = buffer[sent:max(limit, sent)].rstrip()
+        if not started:
+            sent += len(text) - len(text.lstrip())
+            text = text.lstrip()
+        if text:
+            started = True
+            sent += len(text)
+            yield text
+        if end >= 0:
+            return
+    if sent is not None:
+        text = buffer[sent:].rstrip() if started else buffer[sent:].strip()
+        if text:
+            yield text
+
+
+class Predictor:
+    """A dspy predictor that always runs against the shared LM.
+
+    dspy keeps its settings per thread, so the LM is supplied through
+    dspy.context on every call rather than relying on whichever thread
+    happened to configure it first. If a ResponseCache is given, calls are
+    answered from it when possible and their results stored in it. Every
+    call is timed and reported to instrumentation under name, and runs in
+    the given scheduler lane ('interactive' for calls a user is waiting on,
+    'background' otherwise).
+    """
+
+    def __init__(self, module, cache=None, name=None, lane=BACKGROUND):
+        self.module = module
+        self.cache = cache
+        self.name = name or type(module).__name__
+        self.lane = lane
+
+    def __call__(self, **kwargs):
+        with instrumentation.llm_call(self.name) as call:
+            if self.cache is not None:
+                cached = self.cache.get(kwargs)
+                if cached is not None:
+                    call['cached'] = True
+                    return cached
+
+            attempt, tokens = self._attempt(kwargs)
+            result = get_scheduler().run(attempt, lane=self.lane, tokens=tokens,
+                                         usage=lambda: call['prompt_tokens'] + call['completion_tokens'])
+            if self.cache is not None:
+                self.cache.set(kwargs, result)
+            return result
+
+    async def acall(self, **kwargs):
+        """Coroutine version of calling the predictor; no thread is held while waiting for a scheduler slot."""
+        with instrumentation.llm_call(self.name) as call:
+            if self.cache is not None:
+                cached = self.cache.get(kwargs)
+                if cached is not None:
+                    call['cached'] = True
+                    return cached
+
+            attempt, tokens = self._attempt(kwargs)
+            result = await get_scheduler().run_async(attempt, lane=self.lane, tokens=tokens,
+                                                     usage=lambda: call['prompt_tokens'] + call['completion_tokens'])
+            if self.cache is not None:
+                self.cache.set(kwargs, result)
+            return result
+
+    def stream(self, field, **kwargs):
+        """Call the predictor with a single streamed LM request.
+
+        Yields ('token', text) events with the text of the output field as it
+        is generated, then ('result', prediction): the prediction a plain call
+        would return for the same prompt, which is served from and stored in
+        the cache in the same way. A streamed call is not retried.
+        """
+        import dsp
+        from dspy.primitives.prediction import Prediction
+        from dspy.signatures.signature import signature_to_template
+
+        with instrumentation.llm_call(self.name) as call:
+            if self.cache is not None:
+                cached = self.cache.get(kwargs)
+                if cached is not None:
+                    call['cached'] = True
+                    yield 'token', str(getattr(cached, field))
+                    yield 'result', cached
+                    return
+
+            lm = get_lm()
+            predict_module = getattr(self.module, '_predict', self.module)
+            signature = getattr(predict_module, 'extended_signature', predict_module.signature)
+            template = signature_to_template(signature)
+            example = dsp.Example(demos=predict_module.demos, **kwargs)
+            outputs = [f for f in template.fields if f.input_variable not in kwargs]
+            position = next(i for i, f in enumerate(outputs) if f.output_variable == field)
+            next_prefix = outputs[position + 1].name if position + 1 < len(outputs) else None
+
+            scheduler = get_scheduler()
+            tokens = estimate_tokens(kwargs.values(), lm)
+            scheduler.acquire(self.lane, tokens)
+            usage, chunks = {}, []
+
+            def completion():
+                for chunk in stream_completion(lm, template(example), usage):
+                    chunks.append(chunk)
+                    yield chunk
+
+            stream = completion()
+            try:
+                for text in field_text(stream, outputs[position].name, next_prefix, at_start=position == 0):
+                    yield 'token', text
+                for _ in stream:  # the fields after this one
+                    pass
+            finally:
+                instrumentation.record_usage(usage)
+                scheduler.release(tokens, sum(usage.values()) or None)
+
+            extracted = template.extract(example, ''.join(chunks))
+            result = Prediction.from_completions(
+                [{f.output_variable: extracted.get(f.output_variable) or '' for f in outputs}], signature=signature)
+            if self.cache is not None:
+                self.cache.set(kwargs, result)
+            yield 'result', result
+
+    def _attempt(self, kwargs):
+        """A callable making one LM request for kwargs, and its estimated token cost."""
+        import dspy
+        lm = get_lm()
+
+        def attempt():
+            with dspy.context(lm=lm):
+                return self.module(**kwargs)
+
+        return attempt, estimate_tokens(kwargs.values(), lm, getattr(self.module, 'config', {}).get('max_tokens'))
+
+
+def signature_name(signature):
+    return signature if isinstance(signature, str) else signature.__name__
+
+
+def predict(signature, cache=None, name=None, lane=BACKGROUND, **config):
+    """A Predictor over dspy.Predict; config (e.g. max_tokens) is passed to the LM on every call."""
+    import dspy
+    return Predictor(dspy.Predict(signature, **config), cache=cache, name=name or signature_name(signature), lane=lane)
+
+
+def chain_of_thought(signature, cache=None, name=None, lane=BACKGROUND):
+    import dspy
+    return Predictor(dspy.ChainOfThought(signature), cache=cache, name=name or signature_name(signature), lane=lane)
+
+
+class LazyObject:
+    """Proxy that builds its target with factory on first attribute access."""
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_target(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    object.__setattr__(self, '_target', self._factory())
+        return self._target
+
+    @property
+    def is_loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._get_target(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_target(), name, value)
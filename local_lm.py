@@ -0,0 +1,148 @@
+"""Deterministic local stand-in for the OpenAI LM.
+
+LocalLM answers any dspy signature without a network: it reads the output
+fields from the prompt's format section and fills them with values derived
+from the input fields, so the same inputs always give the same outputs.
+Latency and token counts are simulated so the rest of the app can be
+profiled and load-tested on its own.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+from dsp.modules.lm import LM
+
+STOP_WORDS = {
+    'about', 'also', 'and', 'are', 'been', 'description', 'for', 'from', 'have', 'into', 'job', 'that',
+    'the', 'their', 'this', 'title', 'user', 'with', 'will', 'would', 'your', 'what', 'when', 'which',
+}
+TRAITS = ['curious', 'collaborative', 'detail-oriented', 'pragmatic', 'self-motivated', 'communicative']
+
+
+class LocalLM(LM):
+    max_history = 100
+
+    def __init__(self, latency=0.0, token_latency=0.0, completion_tokens=60, model='local-stand-in'):
+        super().__init__(model)
+        self.provider = 'local'
+        self.latency = latency
+        self.token_latency = token_latency
+        self.completion_tokens = completion_tokens
+        self.kwargs['model'] = model
+        self.prompt_tokens_total = 0
+        self.completion_tokens_total = 0
+        self._lock = threading.Lock()
+
+    def _simulate(self, completion_tokens):
+        delay = self.latency + self.token_latency * completion_tokens
+        if delay > 0:
+            time.sleep(delay)
+
+    @staticmethod
+    def _fields(prompt):
+        """Return (output prefixes still to produce, {input prefix: value}) for a dspy prompt."""
+        sections = prompt.split('\n\n---\n\n')
+        format_section = next((s for s in sections if s.startswith('Follow the following format.')), '')
+        prefixes = re.findall(r'^([A-Z][A-Za-z0-9 ]*):', format_section, re.MULTILINE)
+
+        values, current = {}, None
+        for line in sections[-1].split('\n'):
+            prefix = line.split(':', 1)[0]
+            if ':' in line and prefix in prefixes:
+                current = prefix
+                values[current] = line.split(':', 1)[1].strip()
+            elif current is not None:
+                values[current] += '\n' + line
+
+        requested = current if current in prefixes else prefixes[-1]
+        inputs = {prefix: value for prefix, value in values.items() if prefix != requested}
+        return prefixes[prefixes.index(requested):], inputs
+
+    @staticmethod
+    def _keywords(text, limit=6):
+        words = [w for w in re.findall(r'[a-z][a-z+#.]{3,}', text.lower()) if w not in STOP_WORDS]
+        return [word for word, _ in Counter(words).most_common(limit)]
+
+    def _batch_results(self, inputs):
+        """Answer a batched signature: one object per item of the JSON list input, keyed by its id."""
+        shared = {prefix: value for prefix, value in inputs.items() if not value.lstrip().startswith('[')}
+        items = next((json.loads(value) for value in inputs.values() if value.lstrip().startswith('[')), [])
+        results = []
+        for item in items:
+            item_inputs = {**shared, **{key: str(value) for key, value in item.items() if key != 'id'}}
+            digest = hashlib.sha256(repr(sorted(item_inputs.items())).encode('utf-8')).hexdigest()
+            if 'text' in item:
+                result = {'skills': self._value('skills', item_inputs, digest).split(', ')}
+            else:
+                result = {'compatibility_score': float(self._value('compatibility score', item_inputs, digest)),
+                          'reasoning': self._value('reasoning', item_inputs, digest)}
+            results.append({'id': item['id'], **result})
+        return json.dumps(results)
+
+    def _value(self, field, inputs, digest):
+        name = field.lower()
+        query = '\n'.join(inputs.values())
+        fraction = int(digest[:8], 16) / 0xFFFFFFFF
+        if name == 'results':
+            return self._batch_results(inputs)
+        if name == 'reasoning':
+            return 'produce the answer. We weigh the inputs above against each other.'
+        if 'skills' in name or 'profile' in name:
+            return ', '.join(self._keywords(query)) or 'communication'
+        if 'compatibility' in name:
+            return f'{0.3 + 0.7 * fraction:.2f}'
+        if name in ('clarity', 'coherence'):
+            return str(1 + int(fraction * 5) % 5)
+        if name == 'score':
+            return str(1 + int(fraction * 10) % 10)
+        if 'complete' in name:
+            return 'True' if re.search(r'\b(apply|submit)\b', inputs.get('User Input', ''), re.I) else 'False'
+        if 'similar jobs' in name:
+            return '\n'.join(f'Job ID: {job_id}, a close match.' for job_id in re.findall(r'Job ID: (\d+)', query)[:3])
+        if name == 'traits':
+            start = int(fraction * len(TRAITS))
+            return ', '.join((TRAITS * 2)[start:start + 3])
+        if name == 'response':
+            topics = ', '.join(self._keywords(query, limit=3)) or 'the role'
+            return f'Thanks for your message. Happy to tell you more about {topics}.'
+        return f'Simulated {name} for benchmarking.'
+
+    def complete(self, prompt):
+        fields, inputs = self._fields(prompt)
+        digest = hashlib.sha256(repr(sorted(inputs.items())).encode('utf-8')).hexdigest()
+        parts = [self._value(fields[0], inputs, digest)]
+        parts += [f'{field}: {self._value(field, inputs, digest)}' for field in fields[1:]]
+        return '\n'.join(parts)
+
+    def basic_request(self, prompt, n=1, **kwargs):
+        completion = self.complete(prompt)
+        usage = {'prompt_tokens': len(prompt) // 4 + 1, 'completion_tokens': self.completion_tokens}
+        self._simulate(usage['completion_tokens'])
+
+        response = {'choices': [{'text': completion, 'finish_reason': 'stop'} for _ in range(n)], 'usage': usage}
+        with self._lock:
+            self.prompt_tokens_total += usage['prompt_tokens']
+            self.completion_tokens_total += usage['completion_tokens']
+            self.history.append({'prompt': prompt, 'response': response, 'kwargs': kwargs, 'raw_kwargs': kwargs})
+            del self.history[:-self.max_history]
+        return response
+
+    def __call__(self, prompt, only_completed=True, return_sorted=False, **kwargs):
+        return [choice['text'] for choice in self.basic_request(prompt, **kwargs)['choices']]
+
+    def stream_completion(self, prompt, usage):
+        """Yield the completion basic_request would give word by word, pacing it like a streamed one."""
+        words = self.complete(prompt).split(' ')
+        usage.update(prompt_tokens=len(prompt) // 4 + 1, completion_tokens=self.completion_tokens)
+        with self._lock:
+            self.prompt_tokens_total += usage['prompt_tokens']
+            self.completion_tokens_total += usage['completion_tokens']
+        if self.latency > 0:
+            time.sleep(self.latency)
+        for i, word in enumerate(words):
+            if self.token_latency > 0:
+                time.sleep(self.token_latency)
+            yield word if i == 0 else ' ' + word
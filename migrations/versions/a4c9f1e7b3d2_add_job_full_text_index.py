@@ -0,0 +1,59 @@
+"""Add full-text index over job title and description
+
+Revision ID: a4c9f1e7b3d2
+Revises: 8b3f6e2d1a94
+Create Date: 2026-10-16 12:02:44.137925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9f1e7b3d2'
+down_revision = '8b3f6e2d1a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # External-content FTS5 table kept in sync with job by triggers.
+        op.execute(
+            "CREATE VIRTUAL TABLE job_fts USING fts5("
+            "title, description, content='job', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER job_fts_ai AFTER INSERT ON job BEGIN "
+            "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER job_fts_ad AFTER DELETE ON job BEGIN "
+            "INSERT INTO job_fts(job_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER job_fts_au AFTER UPDATE ON job BEGIN "
+            "INSERT INTO job_fts(job_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+            "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+            "END"
+        )
+        op.execute("INSERT INTO job_fts(job_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_job_fulltext ON job "
+            "USING gin (to_tsvector('english', title || ' ' || description))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS job_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS job_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS job_fts_ai")
+        op.execute("DROP TABLE IF EXISTS job_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_job_fulltext")
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from skill_cache import normalize_text, text_key
+
+_vectorizer = None
+
+
+def hashed_embedding(text):
+    """Cheap, model-free embedding: L2-normalised hashed character n-grams of the text."""
+    global _vectorizer
+    if _vectorizer is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+        _vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=(3, 4), n_features=2 ** 16,
+                                        alternate_sign=False, norm='l2')
+    return _vectorizer.transform([text])
+
+
+def cosine(a, b):
+    """Dot product of two L2-normalised embeddings, sparse rows or dense vectors."""
+    if hasattr(a, 'multiply'):
+        return float(a.multiply(b).sum())
+    return float(a @ b)
+
+
+class ResponseCache:
+    """In-process cache of predictor outputs, opted into per signature.
+
+    Every entry is keyed exactly on the normalized inputs. If semantic_fields
+    is given, a miss falls back to comparing the embeddings of those fields
+    against entries whose other inputs match exactly, and serves the closest
+    one at or above threshold. Entries expire after ttl seconds and the least
+    recently used are evicted beyond max_items.
+
+    Only give semantic_fields to signatures whose outputs do not depend on who
+    is asking: a near match serves another caller's outputs verbatim.
+    """
+
+    def __init__(self, semantic_fields=(), threshold=None, ttl=None, max_items=None, embed=hashed_embedding):
+        self.semantic_fields = tuple(semantic_fields)
+        self.threshold = threshold if threshold is not None else float(os.environ.get('RESPONSE_CACHE_THRESHOLD', 0.9))
+        self.ttl = ttl if ttl is not None else float(os.environ.get('RESPONSE_CACHE_TTL', 3600))
+        self.max_items = max_items if max_items is not None else int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+        self.embed = embed
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(inputs, fields):
+        return text_key(json.dumps({name: normalize_text(str(inputs[name])) for name in sorted(fields)}))
+
+    def _semantic_text(self, inputs):
+        return ' '.join(normalize_text(str(inputs.get(name, ''))) for name in self.semantic_fields)
+
+    def _expire(self, now):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry['expires_at'] > now and len(self._entries) <= self.max_items:
+                break
+            self._entries.pop(key)
+
+    def get(self, inputs):
+        key = self._key(inputs, inputs)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['output']
+
+        if self.semantic_fields:
+            group = self._key(inputs, [name for name in inputs if name not in self.semantic_fields])
+            vector = self.embed(self._semantic_text(inputs))
+            with self._lock:
+                candidates = [(k, e) for k, e in self._entries.items()
+                              if e['group'] == group and e['expires_at'] > now]
+            best_key, best_entry, best_score = None, None, self.threshold
+            for candidate_key, candidate in candidates:
+                score = cosine(vector, candidate['vector'])
+                if score >= best_score:
+                    best_key, best_entry, best_score = candidate_key, candidate, score
+            if best_entry is not None:
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                return best_entry['output']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, inputs, output):
+        entry = {'output': output, 'expires_at': time.time() + self.ttl, 'group': None, 'vector': None}
+        if self.semantic_fields:
+            entry['group'] = self._key(inputs, [name for name in inputs if name not in self.semantic_fields])
+            entry['vector'] = self.embed(self._semantic_text(inputs))
+        key = self._key(inputs, inputs)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._expire(time.time())
+
+    def invalidate(self, inputs):
+        """Drop the entry stored for exactly these inputs, so it no longer serves near matches either."""
+        with self._lock:
+            self._entries.pop(self._key(inputs, inputs), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'items': len(self._entries),
+            }
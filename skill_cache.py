@@ -0,0 +1,99 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivially different copies share a key."""
+    return re.sub(r'\s+', ' ', (text or '')).strip().lower()
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class SkillCache:
+    """Two-tier cache for skill extraction results.
+
+    Entries are keyed by a hash of the normalized input text. Lookups hit an
+    in-process LRU first and fall back to a SQLite file shared by all workers.
+    Subclasses can store other JSON values by overriding table and column.
+    """
+
+    table = 'skill_cache'
+    column = 'skills'
+
+    def __init__(self, path, max_memory_items=1024):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                f'key TEXT PRIMARY KEY, {self.column} TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, text):
+        key = text_key(text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute(f'SELECT {self.column} FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, value)
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+        return value
+
+    def set(self, text, value):
+        key = text_key(text)
+        self._remember(key, value)
+        with self._connect() as conn:
+            conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, {self.column}, created_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time())
+            )
+
+    def invalidate(self, text):
+        key = text_key(text)
+        with self._lock:
+            self._memory.pop(key, None)
+        with self._connect() as conn:
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_items': len(self._memory),
+            }
@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads its configuration at import time, so point everything at a scratch directory first.
+_scratch = tempfile.mkdtemp(prefix='prescreening-tests-')
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(_scratch, 'test.db'),
+    'SKILL_CACHE_PATH': os.path.join(_scratch, 'skill_cache.db'),
+    'CODE_ASSESSMENT_CACHE_PATH': os.path.join(_scratch, 'code_assessment_cache.db'),
+    'JOB_INDEX_PATH': os.path.join(_scratch, 'job_index'),
+    'LM_BACKEND': 'local',
+    'LOCAL_LM_LATENCY': '0',
+    'OPENAI_API_KEY': 'test',
+    'MATCH_WORKERS': '0',
+})
+
+
+@pytest.fixture
+def app(monkeypatch):
+    import app as application
+    application.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    # Keep the background index publisher and score refresher out of the tests.
+    monkeypatch.setattr(application, 'schedule_job_index_publish', lambda *refreshes: None)
+    monkeypatch.setattr(application, 'schedule_score_refresh', lambda kind, object_id: None)
+    with application.app.app_context():
+        application.db.create_all()
+        yield application
+        application.db.session.remove()
+        application.db.drop_all()
+
+
+def login(client, user):
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+        session['role'] = user.role
+    return client
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from job_index import JobIndex
+from job_vector_store import JobVectorStore
+
+TEXTS = {
+    1: 'python django postgresql',
+    2: 'java kafka spring',
+    3: 'rust embedded firmware',
+    4: 'python pandas spark',
+}
+
+
+def test_top_k_ranks_jobs_by_similarity():
+    index = JobIndex()
+    index.fit(TEXTS)
+
+    ranked = index.top_k('python django', 2)
+    assert [job_id for job_id, _ in ranked] == [1, 4]
+    assert ranked[0][1] > ranked[1][1] > 0
+    assert [job_id for job_id, _ in index.top_k('python django', 3, job_ids={2, 4})] == [4, 2]
+    assert 1 not in dict(index.top_k('python django', 4, exclude={1}))
+
+
+def test_upsert_adds_and_replaces_rows_and_remove_drops_them():
+    index = JobIndex(refit_ratio=10)
+    index.fit(TEXTS)
+
+    index.upsert(5, 'rust firmware embedded')
+    index.upsert(2, 'python django')
+    assert len(index) == 5
+    assert index.similarity('python django', 2) == pytest.approx(index.similarity('python django', 1), rel=0.5)
+    assert index.top_k('rust firmware', 1)[0][0] in (3, 5)
+
+    index.remove(3)
+    index.remove(99)
+    assert 3 not in index and len(index) == 4
+    assert index.top_k('rust firmware', 1)[0][0] == 5
+
+
+def test_job_scores_matches_similarity():
+    index = JobIndex()
+    index.fit(TEXTS)
+
+    scores = index.job_scores(1, ['python django', 'java kafka', ''])
+    assert scores[0] == pytest.approx(index.similarity('python django', 1))
+    assert scores[1] == 0 and scores[2] == 0
+    assert np.all(index.job_scores(99, ['python']) == 0)
+
+
+def test_published_index_is_mapped_by_other_readers(tmp_path):
+    writer = JobIndex(store=JobVectorStore(str(tmp_path)))
+    writer.fit(TEXTS)
+    reader = JobIndex(store=JobVectorStore(str(tmp_path)), check_interval=0)
+
+    assert reader.load()
+    assert reader.version == writer.version
+    assert reader.top_k('python django', 1) == writer.top_k('python django', 1)
+
+    writer.fit({**TEXTS, 5: 'golang kubernetes'})
+    assert reader.top_k('golang kubernetes', 1)[0][0] == 5
+    assert reader.version == writer.version
+
+
+def test_local_updates_to_a_mapped_index_are_not_published(tmp_path):
+    store = JobVectorStore(str(tmp_path))
+    JobIndex(store=store).fit(TEXTS)
+    index = JobIndex(store=store)
+    index.load()
+    version = store.current()
+
+    index.upsert(5, 'golang kubernetes')
+    assert 5 in index
+    assert store.current() == version
+    assert 5 not in store.open()[2]
+
+
+def test_publish_prunes_old_versions_but_keeps_current(tmp_path):
+    store = JobVectorStore(str(tmp_path), keep=2)
+    index = JobIndex(store=store)
+    for job_id in range(1, 5):
+        index.fit({job_id: TEXTS[job_id]})
+
+    versions = [name for name in os.listdir(tmp_path) if name.startswith('v')]
+    assert len(versions) == 2
+    assert store.current() in versions
+    assert store.open()[2] == [4]
+
+
+def test_empty_index(tmp_path):
+    store = JobVectorStore(str(tmp_path))
+    assert store.open() is None
+    index = JobIndex(store=store)
+    index.fit({})
+
+    assert index.is_built
+    assert index.top_k('python', 3) == []
+    assert JobIndex(store=store).load()
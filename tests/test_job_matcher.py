@@ -0,0 +1,44 @@
+from job_matcher import Applicant, Job, JobMatcher
+from job_vector_store import JobVectorStore
+
+JOBS = [Job(1, 'Backend engineer', 'Python, Django and PostgreSQL'),
+        Job(2, 'Data engineer', 'Spark, Kafka and Python pipelines'),
+        Job(3, 'Firmware engineer', 'Embedded C and Rust on microcontrollers')]
+
+
+def test_rank_jobs_does_not_publish_an_index_of_the_callers_jobs(tmp_path):
+    store = JobVectorStore(str(tmp_path))
+    matcher = JobMatcher(vector_store=store)
+
+    ranked = matcher.rank_jobs(Applicant(1, 'Python developer who knows Django'), JOBS[:2], 2)
+
+    assert {job_id for job_id, _ in ranked} <= {1, 2}
+    assert store.current() is None
+    assert not matcher.job_index.is_built
+
+
+def test_rank_jobs_maps_the_published_index(tmp_path):
+    JobMatcher(vector_store=JobVectorStore(str(tmp_path))).build_job_index(JOBS)
+    matcher = JobMatcher(vector_store=JobVectorStore(str(tmp_path)))
+
+    ranked = matcher.rank_jobs(Applicant(1, 'Rust and embedded C'), JOBS[:1], 1)
+
+    assert matcher.job_index.version == matcher.job_index.store.current()
+    assert len(matcher.job_index) == 3
+    assert [job_id for job_id, _ in ranked] == [1]
+
+
+def test_job_skills_reuse_a_near_duplicate_description_but_profiles_do_not():
+    matcher = JobMatcher()
+    calls = []
+    extract = matcher.skill_extractor
+    matcher.skill_extractor = lambda text: (calls.append(text), extract(text=text))[1]
+    description = ("Senior backend engineer to design and run our Python and Django services on PostgreSQL, "
+                   "with Celery workers, Redis caching and deployment on Kubernetes.")
+
+    matcher.extract_skills(description, semantic=True)
+    matcher.extract_skills(description.replace('Senior', 'Lead'), semantic=True)
+    assert len(calls) == 1
+
+    matcher.extract_skills(description.replace('Senior', 'Staff'))
+    assert len(calls) == 2
@@ -0,0 +1,64 @@
+from conftest import login
+
+
+def add_user(app, email, role):
+    user = app.User(email=email, role=role, password_hash='x')
+    app.db.session.add(user)
+    app.db.session.commit()
+    return user
+
+
+def test_recreated_job_does_not_inherit_deleted_job_rows(app):
+    employer = add_user(app, 'employer@example.com', 'employer')
+    applicant = add_user(app, 'applicant@example.com', 'applicant')
+    client = login(app.app.test_client(), employer)
+
+    client.post('/create_job', data={'title': 'Backend engineer', 'description': 'Python and Postgres'})
+    job = app.Job.query.one()
+    conversation = app.Conversation(applicant_id=applicant.id, job_id=job.id, assessment_state='{"through": 1}')
+    app.db.session.add(conversation)
+    app.db.session.flush()
+    app.db.session.add_all([
+        app.ConversationTurn(conversation_id=conversation.id, user_input='hi', response='hello'),
+        app.MatchTask(applicant_id=applicant.id, job_id=job.id, applicant_profile='p', state='done'),
+        app.MatchResult(applicant_id=applicant.id, job_id=job.id, score=0.9, skill_similarity=0.5),
+        app.MatchScore(applicant_id=applicant.id, job_id=job.id, score=0.5),
+        app.Application(applicant_id=applicant.id, job_id=job.id, match_score=0.9),
+    ])
+    app.db.session.commit()
+    old_id = job.id
+
+    assert client.post(f'/delete_job/{old_id}').status_code == 302
+    client.post('/create_job', data={'title': 'Data engineer', 'description': 'Spark'})
+    new_job = app.Job.query.one()
+
+    for model in (app.Conversation, app.MatchTask, app.MatchResult, app.MatchScore, app.Application):
+        assert model.query.filter_by(job_id=new_job.id).count() == 0, model.__name__
+    assert app.ConversationTurn.query.count() == 0
+    assert new_job.id == old_id  # SQLite hands the id out again, which is what made the rows leak
+
+
+def test_best_candidates_only_lists_applicants_to_the_employers_jobs(app):
+    employer = add_user(app, 'employer@example.com', 'employer')
+    competitor = add_user(app, 'competitor@example.com', 'employer')
+    own = add_user(app, 'own@example.com', 'applicant')
+    other = add_user(app, 'other@example.com', 'applicant')
+    jobs = [app.Job(title=title, description='Python', employer_id=owner.id, unique_link=title)
+            for title, owner in (('first', employer), ('second', employer), ('theirs', competitor))]
+    app.db.session.add_all(jobs)
+    app.db.session.flush()
+    first, second, theirs = jobs
+    app.db.session.add_all([
+        app.Application(applicant_id=own.id, job_id=second.id),
+        app.Application(applicant_id=other.id, job_id=theirs.id),
+        app.MatchScore(applicant_id=own.id, job_id=first.id, score=0.4),
+        app.MatchScore(applicant_id=other.id, job_id=first.id, score=0.9),
+        app.ApplicantProfile(applicant_id=other.id, profile='Private profile text'),
+    ])
+    app.db.session.commit()
+
+    page = login(app.app.test_client(), employer).get(f'/best_candidates/{first.id}').get_data(as_text=True)
+
+    assert 'own@example.com' in page
+    assert 'other@example.com' not in page
+    assert 'Private profile text' not in page
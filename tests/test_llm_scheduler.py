@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from llm_scheduler import BACKGROUND, INTERACTIVE, LLMScheduler, SchedulerBusy
+
+
+class RateLimitError(Exception):
+    """Named like the provider's error, which the scheduler treats as retryable."""
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_interactive_calls_go_before_queued_background_calls():
+    scheduler = LLMScheduler(max_concurrency=2, interactive_reserve=1)
+    scheduler.acquire(INTERACTIVE)  # the single slot background calls may use is now taken
+    order = []
+
+    def call(lane, name):
+        scheduler.acquire(lane)
+        order.append(name)
+        scheduler.release()
+
+    background = threading.Thread(target=call, args=(BACKGROUND, 'background'))
+    background.start()
+    wait_for(lambda: scheduler.stats()['waiting_background'] == 1)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE, 'interactive'))
+    interactive.start()
+    interactive.join(2)
+    scheduler.release()
+    background.join(2)
+
+    assert order == ['interactive', 'background']
+
+
+def test_background_calls_leave_the_interactive_reserve_free():
+    scheduler = LLMScheduler(max_concurrency=2, interactive_reserve=1)
+    scheduler.acquire(BACKGROUND)
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(BACKGROUND, timeout=0.05)
+    scheduler.acquire(INTERACTIVE, timeout=0.05)
+    assert scheduler.stats()['running'] == 2
+
+
+def test_full_queue_rejects_immediately():
+    scheduler = LLMScheduler(max_concurrency=1, interactive_reserve=0, queue_size=1)
+    scheduler.acquire(BACKGROUND)
+    waiter = threading.Thread(target=lambda: scheduler.acquire(BACKGROUND, timeout=0.5))
+    waiter.start()
+    wait_for(lambda: scheduler.stats()['waiting_background'] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(SchedulerBusy, match='queue is full'):
+        scheduler.acquire(BACKGROUND, timeout=5)
+    assert time.monotonic() - started < 0.5
+    scheduler.release()
+    waiter.join(2)
+    assert scheduler.stats()['rejected'] >= 1
+
+
+def test_transient_failures_are_retried_then_raise_scheduler_busy():
+    scheduler = LLMScheduler(max_retries=2, base_delay=0.001, max_delay=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return 'ok'
+
+    assert scheduler.run(flaky) == 'ok'
+    assert scheduler.stats()['retries'] == 2
+
+    def down():
+        raise RateLimitError()
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.run(down)
+    assert scheduler.stats()['running'] == 0
+
+
+def test_other_errors_are_not_retried():
+    scheduler = LLMScheduler(base_delay=0.001)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError('bad prompt')
+
+    with pytest.raises(ValueError):
+        scheduler.run(broken)
+    assert len(attempts) == 1
+    assert scheduler.stats()['running'] == 0
+
+
+def test_token_bucket_is_corrected_with_the_real_usage():
+    scheduler = LLMScheduler(tokens_per_minute=1000)
+    scheduler.run(lambda: None, tokens=600, usage=lambda: 100)
+
+    assert scheduler.tokens.level == pytest.approx(900, abs=5)
+
+
+def test_run_async_shares_the_queues():
+    import asyncio
+
+    scheduler = LLMScheduler(max_concurrency=1, interactive_reserve=0)
+
+    async def main():
+        return await asyncio.gather(*(scheduler.run_async(lambda i=i: i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+    assert scheduler.stats()['running'] == 0
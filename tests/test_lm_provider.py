@@ -0,0 +1,32 @@
+from lm_provider import chain_of_thought, field_text
+
+COMPLETION = "we check the inputs.\n\nResponse: Happy to help with that.\n\nApplication Complete: False"
+
+
+def chunked(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def test_field_text_picks_one_field_out_of_any_chunking():
+    for size in (1, 3, 7, len(COMPLETION)):
+        text = ''.join(field_text(chunked(COMPLETION, size), 'Response:', 'Application Complete:'))
+        assert text == 'Happy to help with that.'
+
+
+def test_field_text_for_the_first_and_last_fields():
+    assert ''.join(field_text(chunked(COMPLETION, 4), None, 'Response:', at_start=True)) == 'we check the inputs.'
+    assert ''.join(field_text(chunked(COMPLETION, 4), 'Application Complete:', None)) == 'False'
+
+
+def test_streamed_call_gives_the_plain_call_result():
+    signature = "history: str, user_input: str -> response: str, application_complete: bool"
+    inputs = {'history': '', 'user_input': 'I would like to apply for the Python role'}
+    expected = chain_of_thought(signature)(**inputs)
+
+    events = list(chain_of_thought(signature).stream('response', **inputs))
+
+    tokens = ''.join(payload for event, payload in events if event == 'token')
+    result = events[-1][1]
+    assert events[-1][0] == 'result'
+    assert tokens == result.response == expected.response
+    assert result.application_complete == expected.application_complete
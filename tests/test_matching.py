@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+
+@pytest.fixture
+def application_pair(app):
+    employer = app.User(email='employer@example.com', role='employer', password_hash='x')
+    applicant = app.User(email='applicant@example.com', role='applicant', password_hash='x')
+    app.db.session.add_all([employer, applicant])
+    app.db.session.flush()
+    job = app.Job(title='Backend engineer', description='Python', employer_id=employer.id, unique_link='job')
+    app.db.session.add(job)
+    app.db.session.commit()
+    return job, applicant.id
+
+
+def test_enqueue_match_reuses_the_active_task(app, application_pair):
+    job, applicant_id = application_pair
+    first = app.enqueue_match(job, applicant_id, 'first profile')
+    second = app.enqueue_match(job, applicant_id, 'second profile')
+
+    assert first.id == second.id
+    assert app.MatchTask.query.one().applicant_profile == 'second profile'
+
+
+def test_only_one_active_task_per_application(app, application_pair):
+    job, applicant_id = application_pair
+    app.enqueue_match(job, applicant_id, 'profile')
+    app.db.session.add(app.MatchTask(applicant_id=applicant_id, job_id=job.id, applicant_profile='p', state='queued'))
+    with pytest.raises(IntegrityError):
+        app.db.session.commit()
+    app.db.session.rollback()
+
+    app.MatchTask.query.update({'state': 'done'})
+    app.db.session.commit()
+    assert app.enqueue_match(job, applicant_id, 'again').state == 'queued'
+    assert app.MatchTask.query.count() == 2
+
+
+def test_save_application_updates_an_existing_application(app, application_pair):
+    job, applicant_id = application_pair
+    app.save_application(applicant_id, job.id, 0.8)
+    app.save_application(applicant_id, job.id, 0.9)
+
+    assert [a.match_score for a in app.Application.query.all()] == [0.9]
+    app.db.session.add(app.Application(applicant_id=applicant_id, job_id=job.id))
+    with pytest.raises(IntegrityError):
+        app.db.session.commit()
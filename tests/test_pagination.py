@@ -0,0 +1,86 @@
+import html
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import login
+from test_jobs import add_user
+
+NEXT_LINK = re.compile(r'href="([^"]*after=[^"]*)"')
+
+
+def test_cursor_round_trip(app):
+    when = datetime(2024, 5, 1, 12, 30, 15, 250)
+    assert app.decode_cursor(app.encode_cursor(when, 7), 'date') == (when, 7)
+    assert app.decode_cursor(app.encode_cursor(0.75, 8), 'score') == (0.75, 8)
+    assert app.decode_cursor(app.encode_cursor(None, 9), 'score') == (-1.0, 9)
+    assert app.decode_cursor(app.encode_cursor('accepted', 10), 'status') == ('accepted', 10)
+
+
+@pytest.fixture
+def applications(app):
+    employer = add_user(app, 'employer@example.com', 'employer')
+    client = login(app.app.test_client(), employer)
+    client.post('/create_job', data={'title': 'Backend engineer', 'description': 'Python and Postgres'})
+    job = app.Job.query.one()
+
+    start = datetime(2024, 1, 1)
+    scores = [None, 0.5, 0.5, 0.9, None, 0.1, 0.5]
+    statuses = ['pending', 'accepted', 'rejected']
+    for i in range(23):
+        applicant = add_user(app, f'applicant{i:02d}@example.com', 'applicant')
+        app.db.session.add(app.Application(
+            applicant_id=applicant.id,
+            job_id=job.id,
+            status=statuses[i % len(statuses)],
+            # Every fourth application shares a timestamp with the one before it.
+            application_date=start + timedelta(hours=i - (i % 4 == 3)),
+            match_score=scores[i % len(scores)],
+        ))
+    app.db.session.commit()
+    return client, job
+
+
+def walk_pages(client, url):
+    emails, pages = [], 0
+    while url:
+        page = client.get(url).get_data(as_text=True)
+        emails += re.findall(r'<td>(applicant\d+@example\.com)</td>', page)
+        pages += 1
+        match = NEXT_LINK.search(page)
+        url = html.unescape(match.group(1)) if match else None
+    return emails, pages
+
+
+@pytest.mark.parametrize('sort', ['date', 'score', 'status'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_pages_cover_every_applicant_once_in_order(app, applications, sort, order):
+    client, job = applications
+    key = {
+        'date': lambda a: a.application_date,
+        'score': lambda a: -1.0 if a.match_score is None else a.match_score,
+        'status': lambda a: a.status,
+    }[sort]
+    ordered = sorted(app.Application.query.all(), key=lambda a: (key(a), a.id), reverse=order == 'desc')
+    expected = [app.db.session.get(app.User, a.applicant_id).email for a in ordered]
+
+    emails, pages = walk_pages(client, f'/view_applicants/{job.id}?sort={sort}&order={order}&per_page=5')
+
+    assert emails == expected
+    assert pages == 5
+
+
+def test_status_filter_is_kept_across_pages(app, applications):
+    client, job = applications
+    emails, _ = walk_pages(client, f'/view_applicants/{job.id}?status=accepted&per_page=3')
+    accepted = app.db.session.query(app.User.email).join(
+        app.Application, app.Application.applicant_id == app.User.id).filter(app.Application.status == 'accepted')
+    assert sorted(emails) == sorted(email for email, in accepted)
+
+
+def test_malformed_cursor_starts_from_the_first_page(app, applications):
+    client, job = applications
+    response = client.get(f'/view_applicants/{job.id}?per_page=5&after=not-a-cursor')
+    assert response.status_code == 200
+    assert len(re.findall(r'applicant\d+@example\.com', response.get_data(as_text=True))) == 5
@@ -0,0 +1,50 @@
+from response_cache import ResponseCache
+
+DESCRIPTION = ("Senior backend engineer to design and run our Python and Django services on PostgreSQL, "
+               "with Celery workers, Redis caching and deployment on Kubernetes.")
+
+
+def test_exact_hit():
+    cache = ResponseCache()
+    cache.set({'text': 'hello', 'lang': 'en'}, 'output')
+
+    assert cache.get({'text': 'hello', 'lang': 'en'}) == 'output'
+    assert cache.get({'text': 'hello!', 'lang': 'en'}) is None
+
+
+def test_semantic_hit_for_a_near_duplicate():
+    cache = ResponseCache(semantic_fields=('text',), threshold=0.9)
+    cache.set({'text': DESCRIPTION}, 'skills')
+
+    assert cache.get({'text': DESCRIPTION.replace('Senior', 'Lead')}) == 'skills'
+    assert cache.stats()['semantic_hits'] == 1
+
+
+def test_semantic_miss_for_different_text_or_other_inputs():
+    cache = ResponseCache(semantic_fields=('text',), threshold=0.9)
+    cache.set({'text': DESCRIPTION, 'difficulty': 'easy'}, 'skills')
+
+    assert cache.get({'text': 'Embedded C and Rust firmware for microcontrollers', 'difficulty': 'easy'}) is None
+    # Fields outside semantic_fields must match exactly.
+    assert cache.get({'text': DESCRIPTION, 'difficulty': 'hard'}) is None
+    assert cache.stats()['semantic_hits'] == 0
+
+
+def test_invalidate_stops_near_matches():
+    cache = ResponseCache(semantic_fields=('text',), threshold=0.9)
+    cache.set({'text': DESCRIPTION}, 'skills')
+    cache.invalidate({'text': DESCRIPTION})
+
+    assert cache.get({'text': DESCRIPTION.replace('Senior', 'Lead')}) is None
+
+
+def test_entries_expire_and_are_evicted():
+    cache = ResponseCache(ttl=0)
+    cache.set({'text': 'a'}, 1)
+    assert cache.get({'text': 'a'}) is None
+
+    cache = ResponseCache(max_items=2)
+    for text in 'abc':
+        cache.set({'text': text}, text)
+    assert cache.get({'text': 'a'}) is None
+    assert cache.get({'text': 'c'}) == 'c'